@@ -5,126 +5,26 @@ import urllib.parse
 import math
 import re
 
-##################################################
-# Constants
-##################################################
-GB_PER_TB = 1024
-SUPPORTED_UNITS = ["GB", "TB"]
-
-##################################################
-# Model Definition
-##################################################
-class DiskSpaceModel:
-    def __init__(self):
-        # All values are stored internally in GB
-        self.total_space_gb = 0.0
-        self.current_free_space_gb = 0.0
-        self.target_free_percentage = None
-
-    def set_total_space_gb(self, value_gb):
-        self.total_space_gb = value_gb
-
-    def set_free_space_gb(self, value_gb):
-        self.current_free_space_gb = value_gb
-
-    def get_used_space_gb(self):
-        return self.total_space_gb - self.current_free_space_gb
-
-    def get_free_percentage(self):
-        if self.total_space_gb == 0:
-            return 0
-        return (self.current_free_space_gb / self.total_space_gb) * 100
-
-    def get_used_percentage(self):
-        return 100 - self.get_free_percentage()
-
-    def get_additional_space_needed_gb(self):
-        if self.target_free_percentage is None or self.total_space_gb == 0:
-            return None
-        P = self.target_free_percentage / 100.0
-        T = self.total_space_gb
-        F = self.current_free_space_gb
-
-        if P >= 1.0:
-            return None  # Cannot have 100% or more free space
-
-        denominator = 1.0 - P
-        if denominator == 0:
-            return None  # Prevent division by zero
-
-        A = (T * P - F) / denominator
-
-        if A > 0:
-            return math.ceil(A)
-        else:
-            return 0
-
-##################################################
-# Helper Functions
-##################################################
-def safe_float(s):
-    s = s.strip()
-    if s == '' or s == '.':
-        return None
-    try:
-        return float(s)
-    except ValueError:
-        return None
-
-def convert_to_gb(value, unit):
-    """Converts value to GB based on the unit."""
-    if unit == "GB":
-        return value
-    elif unit == "TB":
-        return value * GB_PER_TB
-    else:
-        raise ValueError(f"Unsupported unit: {unit}")
-
-def convert_from_gb(value_gb, unit):
-    """Converts value from GB to the specified unit."""
-    if unit == "GB":
-        return value_gb
-    elif unit == "TB":
-        return value_gb / GB_PER_TB
-    else:
-        raise ValueError(f"Unsupported unit: {unit}")
-
-def make_email_body(server_name, volume_name, model, total_unit, free_unit, used_unit, cleanup_ran=False):
-    
-    used_gb = model.get_used_space_gb()
-    free_gb = model.current_free_space_gb
-
-    total_str = f"{convert_from_gb(model.total_space_gb, total_unit):.2f} {total_unit}"
-    free_str = f"{convert_from_gb(free_gb, free_unit):.2f} {free_unit}"
-    used_str = f"{convert_from_gb(used_gb, used_unit):.2f} {used_unit}"
-
-    free_pct = model.get_free_percentage()
-    used_pct = model.get_used_percentage()
-
-    additional_needed_gb = model.get_additional_space_needed_gb()
-    additional_str = f"{additional_needed_gb} GB" if additional_needed_gb else "0 GB"
-
-    target_perc = model.target_free_percentage if model.target_free_percentage else 0.0
-
-    # Status line changes based on the checkbox
-    status_line = (
-        "After running cleanup tools, we were unable to free enough space to clear the alert.\n\n"
-        if cleanup_ran else
-        "Would you like us to run clean up tools or add additional space?\n\n"
-    )
-
-    return (
-        "Hello,\n\n"
-        f"We received an alert for low space on {server_name} Volume {volume_name}\n\n"
-        "Current volume details:\n"
-        f"Total Capacity: {total_str}\n"
-        f"Total Used/Free: {used_str} / {free_str}\n"
-        f"Percent Used/Free: {used_pct:.2f}% / {free_pct:.2f}%\n\n"
-        f"{status_line}"
-        f"Adding or Clearing {additional_str} will get the volume to {target_perc:.2f}% free space.\n\n"
-        "Please let us know how you would like to proceed.\n\n"
-        "Thank you"
-    )
+# The model, conversions and email rendering live in disk_space_core so they
+# can be imported without Tk; they are re-exported here for existing scripts.
+from disk_space_core import (
+    GB_PER_TB,
+    SUPPORTED_UNITS,
+    DiskSpaceModel,
+    FleetModel,
+    FleetResult,
+    safe_float,
+    convert_to_gb,
+    convert_from_gb,
+    make_email_body,
+    make_email_subject,
+    make_result_text,
+)
+from target_sweep import TargetSweep, parse_targets
+from instrumentation import instrumented
+
+# Delay before recalculating after an edit; 0 refreshes once the event queue is idle
+RECALC_DELAY_MS = 0
 
 ##################################################
 # Controller Class
@@ -138,6 +38,7 @@ class DiskSpaceCalculatorApp:
         self.root.resizable(True, True)
 
         self.model = DiskSpaceModel()
+        self.model.add_observer(self.on_model_change)
 
         # Variables
         self.vars = {
@@ -236,10 +137,21 @@ class DiskSpaceCalculatorApp:
 
         ttk.Button(button_frame, text="Clear", command=self.clear_all).pack(side="right", padx=5)
         ttk.Button(button_frame, text="Generate Email", command=self.generate_email_popup).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Compare Targets", command=self.compare_targets_popup).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Fleet View", command=self.fleet_view_popup).pack(side="right", padx=5)
 
         # Refresh flag to prevent recursive updates
         self.refreshing = False
 
+        # Pending after/after_idle id and the text currently shown in result_text
+        self._update_pending = None
+        self.rendered_text = ""
+        self.showing_message = False
+
+        # Server/volume/client of the fleet row loaded into the calculator, used to prefill the email popup
+        self.email_defaults = {}
+        self.fleet_view = None
+
         # Attach separate trace handlers using lambda functions
         self.vars['total'].trace_add('write', lambda *args: self.on_space_change('total'))
         self.vars['free'].trace_add('write', lambda *args: self.on_space_change('free'))
@@ -254,6 +166,7 @@ class DiskSpaceCalculatorApp:
         """Allow only digits and a single decimal point."""
         return bool(re.match(r'^\d*\.?\d*$', new_value))
 
+    @instrumented("gui.on_space_change")
     def on_space_change(self, space_type):
         if self.refreshing:
             return
@@ -284,9 +197,10 @@ class DiskSpaceCalculatorApp:
                 free_display = convert_from_gb(free_gb, self.units['free'].get())
                 self.vars['free'].set(f"{free_display:.2f}")
 
-        self.update_results()
+        self.refresh_message()
         self.refreshing = False
 
+    @instrumented("gui.on_target_change")
     def on_target_change(self):
         if self.refreshing:
             return
@@ -294,22 +208,23 @@ class DiskSpaceCalculatorApp:
         target_val = safe_float(self.vars['target'].get())
         if target_val is not None:
             if target_val < 0:
-                self.update_result_display("Error: Target percentage cannot be negative.")
                 self.model.target_free_percentage = None
+                self.update_result_display("Error: Target percentage cannot be negative.")
                 self.refreshing = False
                 return
             elif target_val >= 100.0:
-                self.update_result_display("Error: Target free space percentage must be less than 100%.")
                 self.model.target_free_percentage = None
+                self.update_result_display("Error: Target free space percentage must be less than 100%.")
                 self.refreshing = False
                 return
             else:
                 self.model.target_free_percentage = target_val
         else:
             self.model.target_free_percentage = None
-        self.update_results()
+        self.refresh_message()
         self.refreshing = False
 
+    @instrumented("gui.on_unit_change")
     def on_unit_change(self, unit_type):
         if self.refreshing:
             return
@@ -353,80 +268,96 @@ class DiskSpaceCalculatorApp:
             self.refreshing = False
             return
 
-        self.update_results()
+        self.refresh_message()
         self.refreshing = False
 
+    def on_model_change(self, model):
+        """Model observer: refresh the results only when the derived values changed."""
+        self.schedule_update()
+
+    def refresh_message(self):
+        """Replace a displayed error once the inputs are edited, even if the model is unchanged."""
+        if self.showing_message:
+            self.schedule_update()
+
+    def schedule_update(self):
+        """Coalesce a burst of edits into a single results refresh."""
+        if RECALC_DELAY_MS == 0:
+            if self._update_pending is None:
+                self._update_pending = self.root.after_idle(self._flush_update)
+            return
+        # Debounce: restart the delay on every edit
+        self.cancel_update()
+        self._update_pending = self.root.after(RECALC_DELAY_MS, self._flush_update)
+
+    def cancel_update(self):
+        """Drop a scheduled refresh, e.g. when an error message replaces the results."""
+        if self._update_pending is not None:
+            self.root.after_cancel(self._update_pending)
+            self._update_pending = None
+
+    def _flush_update(self):
+        self._update_pending = None
+        self.update_results()
+
+    @instrumented("gui.update_results")
     def update_results(self):
         """Recalculate and update the results based on current inputs."""
-        # Clear the result text widget
-        self.result_text.config(state="normal")
-        self.result_text.delete("1.0", tk.END)
-
-        result_text = ""
+        self.cancel_update()
+        self.showing_message = False
+        self.render_result(self.get_result_text())
 
+    def get_result_text(self):
+        """Build the results text for the current model."""
         # Validate Total Disk Space
         total_val = self.model.total_space_gb
         if total_val == 0:
-            self.result_text.config(state="disabled")
-            return
+            return ""
 
         # Validate Free and Used spaces
         free_val = self.model.current_free_space_gb
         used_val = self.model.get_used_space_gb()
 
         if free_val < 0 or used_val < 0:
-            result_text = "Error: Free or Used space cannot be negative."
-            self.result_text.insert(tk.END, result_text)
-            self.result_text.config(state="disabled")
-            return
+            return "Error: Free or Used space cannot be negative."
 
         if (self.vars['free'].get() and self.vars['used'].get()) and not math.isclose(free_val + used_val, total_val, rel_tol=1e-3):
-            result_text = "Error: Free + Used does not equal Total Disk Space."
-            self.result_text.insert(tk.END, result_text)
-            self.result_text.config(state="disabled")
-            return
-
-        # Calculate percentages
-        free_pct = self.model.get_free_percentage()
-        used_pct = self.model.get_used_percentage()
-
-        result_text += f"Current Free Space: {free_pct:.2f}%\n"
-        result_text += f"Current Used Space: {used_pct:.2f}%"
+            return "Error: Free + Used does not equal Total Disk Space."
 
-        # Handle Target Percentage
-        if self.model.target_free_percentage is not None:
-            additional_needed_gb = self.model.get_additional_space_needed_gb()
-            if additional_needed_gb is not None:
-                if additional_needed_gb > 0:
-                    result_text += f"\nYou need to add {additional_needed_gb} GB to reach {self.model.target_free_percentage:.2f}% free space."
-                else:
-                    result_text += f"\nYou have already met or exceeded the target free space of {self.model.target_free_percentage:.2f}%."
+        return make_result_text(self.model)
 
-        # Insert the result into the Text widget
-        self.result_text.insert(tk.END, result_text)
+    def render_result(self, text):
+        """Write text to the result widget, skipping the update if nothing changed."""
+        if text == self.rendered_text:
+            return
+        self.rendered_text = text
+        self.result_text.config(state="normal")
+        self.result_text.delete("1.0", tk.END)
+        self.result_text.insert(tk.END, text)
         self.result_text.config(state="disabled")
 
     def update_result_display(self, message):
         """Helper function to display error or other messages in the result area."""
-        self.result_text.config(state="normal")
-        self.result_text.delete("1.0", tk.END)
-        self.result_text.insert(tk.END, message)
-        self.result_text.config(state="disabled")
+        self.cancel_update()
+        self.showing_message = True
+        self.render_result(message)
 
     def clear_all(self):
         """Clear all input fields and results."""
         self.refreshing = True
+        self.cancel_update()
         self.vars['total'].set("")
         self.vars['free'].set("")
         self.vars['used'].set("")
         self.vars['target'].set("")
-        self.result_text.config(state="normal")
-        self.result_text.delete("1.0", tk.END)
-        self.result_text.config(state="disabled")
+        self.render_result("")
         self.units['total'].set("GB")
         self.units['free'].set("GB")
         self.units['used'].set("GB")
+        self.showing_message = False
+        self.email_defaults = {}
         self.model = DiskSpaceModel()
+        self.model.add_observer(self.on_model_change)
         self.refreshing = False
 
     def generate_email_popup(self):
@@ -457,7 +388,7 @@ class DiskSpaceCalculatorApp:
                 self.units['used'].get(),
                 cleanup_ran=cleanup_ran  # Pass the new flag here
             )
-            subject = f"[{client_abbreviation}] Low Disk Space Alert on {server_name} Volume {volume_name}"
+            subject = make_email_subject(client_abbreviation, server_name, volume_name)
             mailto_link = f"mailto:?subject={urllib.parse.quote(subject)}&body={urllib.parse.quote(email_body)}"
             webbrowser.open(mailto_link)
             popup.destroy()
@@ -492,6 +423,11 @@ class DiskSpaceCalculatorApp:
         entry_client_abbreviation_popup = ttk.Entry(pframe, width=30)
         entry_client_abbreviation_popup.grid(row=2, column=1, padx=10, pady=10, sticky="ew")
 
+        # Prefill from the fleet row loaded into the calculator, if any
+        entry_server_name_popup.insert(0, self.email_defaults.get('server', ""))
+        entry_volume_name_popup.insert(0, self.email_defaults.get('volume', ""))
+        entry_client_abbreviation_popup.insert(0, self.email_defaults.get('client', ""))
+
         # Checkbutton for "Already ran cleanup tools"
         cleanup_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(pframe, text="Already ran cleanup tools", variable=cleanup_var).grid(row=3, column=0, columnspan=2, pady=5)
@@ -503,6 +439,77 @@ class DiskSpaceCalculatorApp:
         # Configure grid weights for pframe
         pframe.columnconfigure(1, weight=1)
 
+    def compare_targets_popup(self):
+        """Open a popup comparing the space needed at several target percentages."""
+        if self.model.total_space_gb == 0:
+            messagebox.showerror("Input Error", "Please enter the Total Disk Space before comparing targets.")
+            return
+
+        sweep = TargetSweep([self.model.total_space_gb], [self.model.current_free_space_gb])
+
+        def refresh():
+            try:
+                targets = parse_targets(targets_var.get())
+            except ValueError:
+                messagebox.showerror("Input Error", "Enter targets as comma-separated percentages below 100, e.g. 10, 15, 20.", parent=popup)
+                return
+            # Only targets that have not been evaluated yet cost a new column
+            for target in targets:
+                if target not in sweep.targets:
+                    sweep.add_target(target)
+            tree.delete(*tree.get_children())
+            for target in targets:
+                additional_needed_gb = int(sweep.columns[sweep.targets.index(target)][0])
+                tree.insert("", tk.END, values=(f"{target:.2f}%", f"{additional_needed_gb} GB"))
+
+        popup = tk.Toplevel(self.root)
+        popup.title("Compare Target Free Space")
+        popup.geometry("360x320")
+
+        pframe = ttk.Frame(popup, padding="20")
+        pframe.pack(expand=True, fill="both")
+        pframe.columnconfigure(1, weight=1)
+        pframe.rowconfigure(1, weight=1)
+
+        ttk.Label(pframe, text="Targets %:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        targets_var = tk.StringVar(value="10, 15, 20, 25")
+        ttk.Entry(pframe, textvariable=targets_var).grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Button(pframe, text="Compare", command=refresh).grid(row=0, column=2, padx=5, pady=5)
+
+        tree = ttk.Treeview(pframe, columns=("target", "additional"), show="headings", height=8)
+        tree.heading("target", text="Target Free Space")
+        tree.heading("additional", text="Space To Add")
+        tree.grid(row=1, column=0, columnspan=3, sticky="nsew", pady=10)
+
+        refresh()
+
+    def fleet_view_popup(self):
+        """Open (or raise) the fleet table."""
+        if self.fleet_view is not None and self.fleet_view.exists():
+            self.fleet_view.lift()
+            return
+        # Imported on first use: it pulls in the batch and SMTP modules
+        from fleet_view import FleetView
+        self.fleet_view = FleetView(self.root, self.load_volume, safe_float(self.vars['target'].get()))
+
+    def load_volume(self, row):
+        """Fill the single-volume calculator from a fleet row."""
+        self.refreshing = True
+        self.cancel_update()
+        total_gb = row['total_space_gb']
+        free_gb = row['free_space_gb']
+        target = row['target_free_percentage']
+        self.vars['total'].set(f"{convert_from_gb(total_gb, self.units['total'].get()):.2f}")
+        self.vars['free'].set(f"{convert_from_gb(free_gb, self.units['free'].get()):.2f}")
+        self.vars['used'].set(f"{convert_from_gb(total_gb - free_gb, self.units['used'].get()):.2f}")
+        self.vars['target'].set("" if target is None else f"{target:g}")
+        self.model.set_total_space_gb(total_gb)
+        self.model.set_free_space_gb(free_gb)
+        self.model.target_free_percentage = target
+        self.email_defaults = {'server': row['server'], 'volume': row['volume'], 'client': row['client']}
+        self.refreshing = False
+        self.update_results()
+
     def show_about(self):
         """Display the About information."""
         about_text = (
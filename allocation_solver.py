@@ -0,0 +1,158 @@
+"""Budget-constrained allocation of spare capacity across a fleet.
+
+get_additional_space_needed_gb answers how much one volume needs; this module
+decides who gets space when only `budget_gb` is available. Needs come from a
+FleetModel and allocations are whole GB, like the scalar model.
+
+Policies:
+    max-volumes      bring as many volumes as possible fully to target
+                     (smallest needs first, which is optimal for the count)
+    min-shortfall    minimize the worst remaining shortfall by "water
+                     filling" the largest needs down to a common level
+
+Both are single greedy passes over a heap, O(n log n) at worst.
+
+Usage:
+    python allocation_solver.py volumes.csv --budget 50T --policy max-volumes [--target 15]
+"""
+import argparse
+import csv
+import heapq
+import math
+import sys
+from array import array
+from collections import namedtuple
+
+from batch_email import parse_number, parse_size, parse_text
+from disk_space_core import FleetModel, parse_size_gb
+from instrumentation import instrumented
+
+MAX_VOLUMES = "max-volumes"
+MIN_SHORTFALL = "min-shortfall"
+POLICIES = [MAX_VOLUMES, MIN_SHORTFALL]
+
+AllocationPlan = namedtuple("AllocationPlan", [
+    "policy", "needed_gb", "allocated_gb", "spent_gb", "remaining_gb", "volumes_met", "worst_shortfall_gb",
+])
+
+def needs_from_fleet(fleet):
+    """Returns the whole-GB need of every volume as array('q'); volumes without a target need 0."""
+    additional = fleet.calculate().additional_space_needed_gb
+    return array('q', (0 if math.isnan(a) else int(a) for a in additional))
+
+def _allocate_max_volumes(needs, budget):
+    allocated = array('q', bytes(8 * len(needs)))
+    heap = [(need, index) for index, need in enumerate(needs) if need > 0]
+    heapq.heapify(heap)
+    while heap and heap[0][0] <= budget:
+        need, index = heapq.heappop(heap)
+        allocated[index] = need
+        budget -= need
+    return allocated
+
+def _allocate_min_shortfall(needs, budget):
+    allocated = array('q', bytes(8 * len(needs)))
+    # Max-heap of needs: pop the largest until the budget can't lower them all to the next one
+    heap = [(-need, index) for index, need in enumerate(needs) if need > 0]
+    heapq.heapify(heap)
+    popped = []
+    popped_sum = 0
+    while heap:
+        next_need = -heap[0][0]
+        if popped and popped_sum - len(popped) * next_need > budget:
+            break
+        need, index = heapq.heappop(heap)
+        popped.append(index)
+        popped_sum -= need
+    if not popped:
+        return allocated
+
+    # Lower every popped volume to a common level, then spend what is left 1 GB at a time
+    count = len(popped)
+    level = max(0, -(-(popped_sum - budget) // count))
+    spent = 0
+    for index in popped:
+        allocated[index] = needs[index] - level
+        spent += allocated[index]
+    leftover = budget - spent
+    if level > 0:
+        for index in sorted(popped)[:leftover]:
+            allocated[index] += 1
+    return allocated
+
+@instrumented("allocation.solve")
+def solve(fleet_or_needs, budget_gb, policy=MAX_VOLUMES):
+    """Allocates `budget_gb` across a FleetModel (or a sequence of whole-GB needs)."""
+    if policy not in POLICIES:
+        raise ValueError(f"Unsupported policy: {policy}")
+    if budget_gb < 0:
+        raise ValueError("Budget cannot be negative.")
+    needs = needs_from_fleet(fleet_or_needs) if isinstance(fleet_or_needs, FleetModel) else array('q', fleet_or_needs)
+    budget = int(budget_gb)
+
+    if policy == MAX_VOLUMES:
+        allocated = _allocate_max_volumes(needs, budget)
+    else:
+        allocated = _allocate_min_shortfall(needs, budget)
+
+    spent = sum(allocated)
+    volumes_met = 0
+    worst_shortfall = 0
+    for need, given in zip(needs, allocated):
+        if need > 0:
+            if given >= need:
+                volumes_met += 1
+            worst_shortfall = max(worst_shortfall, need - given)
+    return AllocationPlan(policy, needs, allocated, spent, budget - spent, volumes_met, worst_shortfall)
+
+##################################################
+# Command Line
+##################################################
+def read_fleet_csv(stream, default_target=None, unit="GB"):
+    """Reads server, volume, total, free[, target] rows; returns (keys, FleetModel).
+
+    Rows with bad sizes or a target that is not a percentage below 100 are skipped.
+    """
+    keys, totals, frees, targets = [], [], [], []
+    for row in csv.DictReader(stream):
+        try:
+            total = parse_size(row.get("total"), unit)
+            free = parse_size(row.get("free"), unit)
+            target = parse_number(row.get("target"))
+        except ValueError:
+            continue
+        if total is None or free is None or free > total or (target is not None and not 0 <= target < 100.0):
+            continue
+        keys.append((parse_text(row.get("server")), parse_text(row.get("volume"))))
+        totals.append(total)
+        frees.append(free)
+        targets.append(default_target if default_target is not None else target)
+    return keys, FleetModel(totals, frees, targets)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Allocate a fixed pool of spare space across volumes.")
+    parser.add_argument("input", help="CSV with server, volume, total, free and optionally target columns")
+    parser.add_argument("--budget", required=True, help="Spare capacity, e.g. 50T or 20480 (GB)")
+    parser.add_argument("--policy", choices=POLICIES, default=MAX_VOLUMES)
+    parser.add_argument("--target", type=float, help="Target free space %% for every volume")
+    parser.add_argument("--unit", default="GB", help="Unit of sizes without a suffix")
+    args = parser.parse_args(argv)
+
+    budget_gb = parse_size_gb(args.budget)
+    if budget_gb is None:
+        parser.error(f"Invalid budget: {args.budget}")
+    with open(args.input, newline="", encoding="utf-8") as f:
+        keys, fleet = read_fleet_csv(f, args.target, args.unit)
+
+    plan = solve(fleet, budget_gb, args.policy)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["server", "volume", "needed_gb", "allocated_gb", "shortfall_gb"])
+    for (server, volume), need, given in zip(keys, plan.needed_gb, plan.allocated_gb):
+        if need > 0:
+            writer.writerow([server, volume, need, given, need - given])
+    print(f"Spent {plan.spent_gb} of {int(budget_gb)} GB; {plan.volumes_met} volumes brought to target; "
+          f"worst shortfall {plan.worst_shortfall_gb} GB", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
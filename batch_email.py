@@ -0,0 +1,304 @@
+"""Command-line batch mode for generating low disk space alert emails.
+
+Streams rows from a CSV or JSONL export through a generator pipeline and
+writes one subject/body per row as CSV, JSONL or individual .eml files.
+Only one row is held in memory at a time, so input size does not matter.
+
+Expected columns: server, volume, client, total, free, target, cleanup_ran.
+Sizes may carry their own unit ("1.5T", "512 GiB", "980M"); bare numbers are
+in --unit, GB by default.
+
+Usage:
+    python batch_email.py alerts.csv -o emails.jsonl
+    python batch_email.py alerts.jsonl --format eml -o outbox/
+    python batch_email.py alerts.csv --format smtp --smtp-host mail --from noc@example.com --to ops@example.com
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from email.message import EmailMessage
+
+from disk_space_core import (
+    SUPPORTED_UNITS,
+    DiskSpaceModel,
+    safe_float,
+    parse_size_gb,
+    make_email_body,
+    make_email_subject,
+)
+from instrumentation import instrumented
+from smtp_dispatch import SmtpDispatcher
+
+INPUT_FIELDS = ["server", "volume", "client", "total", "free", "target", "cleanup_ran"]
+OUTPUT_FIELDS = ["server", "volume", "client", "subject", "body"]
+OUTPUT_FORMATS = ["csv", "jsonl", "eml", "smtp"]
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+##################################################
+# Readers
+##################################################
+def read_csv_rows(stream):
+    """Yields one dict per CSV row."""
+    yield from csv.DictReader(stream)
+
+class InvalidRow(dict):
+    """An empty row standing in for an input line that could not be read; `error` says why."""
+
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+def read_jsonl_rows(stream):
+    """Yields one dict per non-blank JSONL line, or an InvalidRow for a line that is not a JSON object."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield InvalidRow(f"invalid JSON: {e}")
+            continue
+        if isinstance(row, dict):
+            yield row
+        else:
+            yield InvalidRow("not a JSON object")
+
+def read_rows(stream, fmt):
+    if fmt == "csv":
+        return read_csv_rows(stream)
+    elif fmt == "jsonl":
+        return read_jsonl_rows(stream)
+    else:
+        raise ValueError(f"Unsupported input format: {fmt}")
+
+##################################################
+# Pipeline
+##################################################
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+def parse_text(value):
+    """Returns a text cell stripped; a missing value (JSON null, short CSV row) is empty, not "None"."""
+    return "" if value is None else str(value).strip()
+
+def parse_number(value):
+    """Returns a number cell as a float, None if it is empty, or raises ValueError if it is not a number."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return float(value)
+        except OverflowError:
+            raise ValueError("number out of range") from None
+    text = "" if value is None else str(value)
+    number = safe_float(text)
+    if number is None and text.strip() not in ("", "."):
+        raise ValueError(f"{text.strip()!r} is not a number")
+    return number
+
+def parse_size(value, unit="GB"):
+    """Parses a size cell such as "1.5T", "512 GiB" or a bare number in `unit` into GB.
+
+    Returns None for an empty cell or a value that is not a size, and raises
+    ValueError for a cell that is not text or a number (e.g. a JSON list).
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"invalid size: {value!r}")
+    try:
+        return parse_size_gb(value, unit)
+    except OverflowError:
+        raise ValueError("size out of range") from None
+
+def check_row(row):
+    """Raises ValueError if `row` is an InvalidRow or not a mapping."""
+    if isinstance(row, InvalidRow):
+        raise ValueError(row.error)
+    if not isinstance(row, dict):
+        raise ValueError("not a JSON object")
+
+def row_to_model(row, unit="GB"):
+    """Builds a DiskSpaceModel from an input row, raising ValueError on bad data."""
+    check_row(row)
+    total = parse_size(row.get("total"), unit)
+    free = parse_size(row.get("free"), unit)
+    try:
+        target = parse_number(row.get("target"))
+    except ValueError:
+        raise ValueError("target free space percentage must be a number") from None
+    if total is None or free is None:
+        raise ValueError("total and free must be sizes")
+    if free > total:
+        raise ValueError("free space cannot exceed total disk space")
+    if target is not None and not 0 <= target < 100.0:
+        raise ValueError("target free space percentage must be between 0 and 100")
+
+    model = DiskSpaceModel()
+    model.set_total_space_gb(total)
+    model.set_free_space_gb(free)
+    model.target_free_percentage = target
+    return model
+
+@instrumented("batch.render_alert")
+def render_alert(row, unit="GB"):
+    """Renders one input row into an alert dict, raising ValueError on bad data."""
+    check_row(row)
+    server = parse_text(row.get("server"))
+    volume = parse_text(row.get("volume"))
+    client = parse_text(row.get("client"))
+    if not server or not volume or not client:
+        raise ValueError("server, volume and client are required")
+    model = row_to_model(row, unit)
+
+    alert = {
+        "server": server,
+        "volume": volume,
+        "client": client,
+        "subject": make_email_subject(client, server, volume),
+        "body": make_email_body(server, volume, model, unit, unit, unit,
+                                cleanup_ran=parse_bool(row.get("cleanup_ran"))),
+    }
+    # Optional per-row recipient, used by the SMTP writer
+    to = parse_text(row.get("to"))
+    if to:
+        alert["to"] = to
+    return alert
+
+def render_alerts(rows, unit="GB", errors=None):
+    """Yields rendered alert dicts; bad rows are reported to `errors` and skipped."""
+    for line_number, row in enumerate(rows, start=1):
+        try:
+            yield render_alert(row, unit)
+        except ValueError as e:
+            if errors is not None:
+                errors.write(f"Row {line_number}: skipped ({e})\n")
+
+##################################################
+# Writers
+##################################################
+def write_csv(alerts, stream):
+    writer = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for alert in alerts:
+        writer.writerow(alert)
+        count += 1
+    return count
+
+def write_jsonl(alerts, stream):
+    count = 0
+    for alert in alerts:
+        stream.write(json.dumps(alert) + "\n")
+        count += 1
+    return count
+
+def eml_filename(index, alert):
+    name = f"{index:08d}_{alert['server']}_{alert['volume']}"
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name) + ".eml"
+
+def write_eml(alerts, directory):
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for alert in alerts:
+        message = EmailMessage()
+        message["Subject"] = alert["subject"]
+        message.set_content(alert["body"])
+        with open(os.path.join(directory, eml_filename(count, alert)), "wb") as f:
+            f.write(bytes(message))
+        count += 1
+    return count
+
+def write_smtp(alerts, dispatcher, default_to=None, errors=None):
+    """Sends each alert through an SmtpDispatcher and returns the number delivered."""
+    futures = deque()
+    count = 0
+    for alert in alerts:
+        recipients = alert.get("to") or default_to
+        if not recipients:
+            if errors is not None:
+                errors.write(f"{alert['subject']}: skipped (no recipient)\n")
+            continue
+        futures.append(dispatcher.submit(recipients, alert["subject"], alert["body"]))
+        # Collect finished sends as we go so memory stays bounded
+        while futures and futures[0].done():
+            count += _count_sent(futures.popleft(), errors)
+    for future in futures:
+        count += _count_sent(future, errors)
+    return count
+
+def _count_sent(future, errors):
+    result = future.result()
+    if result.error is None:
+        return 1
+    if errors is not None:
+        errors.write(f"{result.subject}: failed after {result.attempts} attempts ({result.error})\n")
+    return 0
+
+##################################################
+# Command Line
+##################################################
+def detect_format(path, choices, default):
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    return extension if extension in choices else default
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate low disk space alert emails in bulk.")
+    parser.add_argument("input", help="CSV or JSONL file of alerts ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output file or .eml directory ('-' for stdout)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"])
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: from output extension, else jsonl)")
+    parser.add_argument("--unit", choices=SUPPORTED_UNITS, default="GB", help="Unit of total and free values without a suffix, also used in the email")
+    parser.add_argument("--smtp-host", help="SMTP server for --format smtp")
+    parser.add_argument("--smtp-port", type=int, default=25)
+    parser.add_argument("--smtp-user")
+    parser.add_argument("--smtp-password")
+    parser.add_argument("--starttls", action="store_true")
+    parser.add_argument("--from", dest="sender", help="Sender address for --format smtp")
+    parser.add_argument("--to", help="Recipient for rows without a 'to' column")
+    parser.add_argument("--smtp-connections", type=int, default=4, help="Pooled SMTP connections")
+    args = parser.parse_args(argv)
+
+    input_format = args.input_format or detect_format(args.input, ["csv", "jsonl"], "csv")
+    output_format = args.format or detect_format(args.output, OUTPUT_FORMATS, "jsonl")
+
+    in_stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        alerts = render_alerts(read_rows(in_stream, input_format), args.unit, errors=sys.stderr)
+        if output_format == "smtp":
+            if not args.smtp_host or not args.sender:
+                parser.error("--format smtp requires --smtp-host and --from")
+            with SmtpDispatcher(args.smtp_host, args.smtp_port, sender=args.sender,
+                                username=args.smtp_user, password=args.smtp_password,
+                                starttls=args.starttls, pool_size=args.smtp_connections) as dispatcher:
+                count = write_smtp(alerts, dispatcher, args.to, errors=sys.stderr)
+        elif output_format == "eml":
+            if args.output == "-":
+                parser.error("--format eml requires an output directory")
+            count = write_eml(alerts, args.output)
+        else:
+            writer = write_csv if output_format == "csv" else write_jsonl
+            if args.output == "-":
+                count = writer(alerts, sys.stdout)
+            else:
+                with open(args.output, "w", newline="", encoding="utf-8") as out_stream:
+                    count = writer(alerts, out_stream)
+    finally:
+        if in_stream is not sys.stdin:
+            in_stream.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    action = "Sent" if output_format == "smtp" else "Wrote"
+    print(f"{action} {count} emails in {elapsed:.2f} s ({rate:,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Reproducible micro-benchmarks for the Disk Space Calculator.
+
+Each case is timed with timeit (best of several repeats) and reported in
+nanoseconds per call. Absolute timings only hold on the machine that recorded
+them, so every run also times a fixed pure-Python calibration loop, and the
+baseline stores each case as a ratio to it. The run fails if a case's ratio is
+more than --tolerance percent above the baseline's, or if a case that ran has
+no baseline entry.
+
+Usage:
+    python benchmarks/run_benchmarks.py                 # compare with baseline.json
+    python benchmarks/run_benchmarks.py --update        # record a new baseline
+    python benchmarks/run_benchmarks.py -k email        # only cases matching "email"
+
+The GUI case needs a display and is skipped when Tk cannot start; on a
+headless machine run it under Xvfb:
+    xvfb-run python benchmarks/run_benchmarks.py --update -k gui
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from disk_space_core import (  # noqa: E402
+    DiskSpaceModel,
+    safe_float,
+    convert_to_gb,
+    convert_from_gb,
+    make_email_body,
+    parse_size_gb,
+    parse_sizes_gb,
+)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 25.0
+DEFAULT_REPEAT = 7
+TARGET_SECONDS = 0.1
+
+##################################################
+# Cases
+##################################################
+def bench_calibration():
+    # Plain loop, float and list work that no change to this repo can affect
+    values = [i * 0.5 for i in range(256)]
+    def run():
+        total = 0.0
+        for value in values:
+            total += value * 1.0001
+        return total
+    return run
+
+def make_model():
+    model = DiskSpaceModel()
+    model.set_total_space_gb(2048.0)
+    model.set_free_space_gb(150.5)
+    model.target_free_percentage = 15.0
+    return model
+
+def bench_additional_space_needed():
+    model = make_model()
+    return model.get_additional_space_needed_gb
+
+def bench_percentages():
+    model = make_model()
+    def run():
+        model.get_free_percentage()
+        model.get_used_percentage()
+    return run
+
+def bench_set_free_space():
+    # Each call invalidates the cached values, so this times the recalculation
+    model = make_model()
+    values = [150.5, 151.5]
+    state = {"i": 0}
+    def run():
+        state["i"] ^= 1
+        model.set_free_space_gb(values[state["i"]])
+        model.get_additional_space_needed_gb()
+    return run
+
+def bench_convert_to_gb():
+    return lambda: convert_to_gb(1.5, "TB")
+
+def bench_convert_from_gb():
+    return lambda: convert_from_gb(1536.0, "TB")
+
+def bench_safe_float():
+    return lambda: safe_float(" 1536.25 ")
+
+def bench_parse_size_gb():
+    return lambda: parse_size_gb("1.5 TiB")
+
+def bench_parse_sizes_gb_10k():
+    column = ["1.5T", "512 GiB", "980M", "2.3PB", "2048"] * 2000
+    return lambda: parse_sizes_gb(column)
+
+def bench_exact_fleet_10k():
+    from exact_model import ExactFleet
+    total = [(2 ** 41) + 4096 * i for i in range(10000)]
+    free = [t // 10 for t in total]
+    fleet = ExactFleet(total, free, 15, "MB")
+    return fleet.calculate
+
+def bench_validate_input():
+    from DiskSpaceCalculator import DiskSpaceCalculatorApp
+    # validate_input does not touch Tk state, so no window is needed
+    return lambda: DiskSpaceCalculatorApp.validate_input(None, "1536.25")
+
+def bench_make_email_body():
+    model = make_model()
+    return lambda: make_email_body("SRV01", "D:", model, "TB", "GB", "GB", cleanup_ran=True)
+
+def bench_gui_update_path():
+    import tkinter as tk
+    from DiskSpaceCalculator import DiskSpaceCalculatorApp
+
+    root = tk.Tk()
+    root.withdraw()
+    app = DiskSpaceCalculatorApp(root)
+    app.vars['total'].set("2048")
+    app.vars['target'].set("15")
+    root.update_idletasks()
+    values = ["150.5", "151.5"]
+    state = {"i": 0}
+
+    def run():
+        # The trace fires on_space_change, which schedules update_results on idle
+        state["i"] ^= 1
+        app.vars['free'].set(values[state["i"]])
+        root.update_idletasks()
+    return run
+
+CASES = {
+    "model.get_additional_space_needed_gb": bench_additional_space_needed,
+    "model.percentages": bench_percentages,
+    "model.set_free_space_gb_recalculate": bench_set_free_space,
+    "convert_to_gb": bench_convert_to_gb,
+    "convert_from_gb": bench_convert_from_gb,
+    "safe_float": bench_safe_float,
+    "parse_size_gb": bench_parse_size_gb,
+    "parse_sizes_gb[10k]": bench_parse_sizes_gb_10k,
+    "exact_fleet[10k]": bench_exact_fleet_10k,
+    "validate_input": bench_validate_input,
+    "make_email_body": bench_make_email_body,
+    "gui.on_space_change_update_results": bench_gui_update_path,
+}
+
+##################################################
+# Runner
+##################################################
+def _sized_timer(func):
+    """Returns a timeit.Timer and the call count that makes one repeat take about TARGET_SECONDS."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < TARGET_SECONDS:
+        number = max(number, int(number * TARGET_SECONDS / max(elapsed, 1e-9)))
+    return timer, number
+
+def time_case(func, calibration, repeat):
+    """Returns (best ns per call, median ratio to the calibration loop).
+
+    Case and calibration repeats alternate, so a machine that slows down for
+    a while during the run slows both sides of each ratio.
+    """
+    timer, number = _sized_timer(func)
+    calibration_timer, calibration_number = _sized_timer(calibration)
+    times = []
+    ratios = []
+    for _ in range(repeat):
+        calibration_time = calibration_timer.timeit(calibration_number) / calibration_number
+        time = timer.timeit(number) / number
+        times.append(time)
+        ratios.append(time / calibration_time)
+    return min(times) * 1e9, statistics.median(ratios)
+
+def run_cases(pattern=None, repeat=DEFAULT_REPEAT):
+    """Returns {case name: (ns per call, ratio to the calibration loop)}.
+
+    """
+    calibration = bench_calibration()
+    results = {}
+    for name, setup in CASES.items():
+        if pattern and pattern not in name:
+            continue
+        try:
+            func = setup()
+        except Exception as e:  # e.g. TclError when there is no display
+            print(f"{name:45s} skipped ({type(e).__name__}: {e})")
+            continue
+        results[name] = time_case(func, calibration, repeat)
+    return results
+
+def _numpy_version():
+    from disk_space_core import load_numpy
+    np = load_numpy()
+    return None if np is None else np.__version__
+
+def load_baseline(path):
+    """Returns {case name: time relative to the calibration loop}."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("unit") != "ratio_to_calibration":
+        return {}  # absolute timings from an older run are not comparable
+    if (data.get("numpy") is None) != (_numpy_version() is None):
+        print("Note: the baseline was recorded " + ("with" if data.get("numpy") else "without") +
+              " NumPy; fleet cases take a different path here")
+    return data.get("results", {})
+
+def save_baseline(path, ratios):
+    data = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "numpy": _numpy_version(),
+        "unit": "ratio_to_calibration",
+        "results": {name: float(f"{value:.4g}") for name, value in sorted(ratios.items())},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+def compare(results, baseline, tolerance):
+    """Prints a comparison table and returns the names of regressed or unrecorded cases."""
+    failures = []
+    for name, (value, ratio) in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:45s} {value:12.1f} ns  x{ratio:10.4g}  NO BASELINE")
+            failures.append(name)
+            continue
+        change = (ratio - base) / base * 100
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            failures.append(name)
+        print(f"{name:45s} {value:12.1f} ns  x{ratio:10.4g}  baseline x{base:10.4g}  {change:+7.1f}%{flag}")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Disk Space Calculator benchmarks.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--update", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown in percent before a case fails")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("-k", dest="pattern", help="Only run cases whose name contains this text")
+    args = parser.parse_args(argv)
+
+    results = run_cases(args.pattern, args.repeat)
+    if args.update:
+        # Keep baselines for cases that were skipped or filtered out of this run
+        merged = load_baseline(args.baseline)
+        merged.update({name: ratio for name, (_, ratio) in results.items()})
+        save_baseline(args.baseline, merged)
+        for name, (value, ratio) in results.items():
+            print(f"{name:45s} {value:12.1f} ns  x{ratio:10.4g}")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    failures = compare(results, load_baseline(args.baseline), args.tolerance)
+    if failures:
+        print(f"FAIL: {len(failures)} case(s) regressed by more than {args.tolerance:g}% or have no baseline "
+              f"(record them with --update)")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
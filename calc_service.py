@@ -0,0 +1,328 @@
+"""Local HTTP JSON service for Disk Space Calculator results.
+
+Endpoints:
+    GET  /health          liveness check
+    POST /v1/volume       one volume -> the figures update_results shows
+    POST /v1/batch        {"volumes": [...]} -> figures plus make_email_body
+                          text for every volume
+
+A volume is {"total": ..., "free": ..., "target": ...} with sizes as numbers
+in "unit" (GB by default) or strings such as "1.5T". Batch volumes may also
+carry server, volume, client and cleanup_ran to get an email rendered.
+
+Connections are kept alive (HTTP/1.1), requests are served by a fixed pool of
+worker threads fed from a bounded queue (overflow gets 503), and identical
+request bodies are answered from an LRU cache bounded by entries and bytes.
+
+Usage:
+    python calc_service.py [--port 8765] [--workers 8] [--queue 64] [--cache 1024] [--cache-mb 64]
+"""
+import argparse
+import json
+import math
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from batch_email import parse_bool, parse_text
+from disk_space_core import (
+    SUPPORTED_UNITS,
+    DiskSpaceModel,
+    make_email_body,
+    make_email_subject,
+    make_result_text,
+    parse_size_gb,
+)
+from instrumentation import instrumented
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE = 64
+DEFAULT_CACHE = 1024
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+# Larger request + response pairs (big batches) are not worth evicting everything else for
+MAX_CACHED_ENTRY_BYTES = 1024 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 5.0
+
+##################################################
+# Calculations
+##################################################
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError("target must be a number")
+    return float(value)
+
+def _reject_constant(name):
+    # json.loads accepts NaN and Infinity, which are not JSON and have no meaning as sizes or targets
+    raise ValueError(f"{name} is not a valid JSON number")
+
+def _size(value, unit):
+    size = parse_size_gb(value, unit) if isinstance(value, (str, int, float)) and not isinstance(value, bool) else None
+    if size is None:
+        raise ValueError(f"invalid size: {value!r}")
+    return size
+
+def volume_to_model(volume, unit="GB"):
+    """Builds a DiskSpaceModel from a request volume, raising ValueError on bad input."""
+    if not isinstance(volume, dict):
+        raise ValueError("each volume must be a JSON object")
+    unit = volume.get("unit", unit)
+    if unit not in SUPPORTED_UNITS:
+        raise ValueError(f"Unsupported unit: {unit}")
+    total = _size(volume.get("total"), unit)
+    free = _size(volume.get("free"), unit)
+    target = volume.get("target")
+    if target is not None:
+        target = _number(target)
+        if target < 0:
+            raise ValueError("Target percentage cannot be negative.")
+        if target >= 100.0:
+            raise ValueError("Target free space percentage must be less than 100%.")
+    if free > total:
+        raise ValueError("Free space cannot exceed Total Disk Space.")
+
+    model = DiskSpaceModel()
+    model.set_total_space_gb(total)
+    model.set_free_space_gb(free)
+    model.target_free_percentage = target
+    return model
+
+def model_figures(model):
+    """The figures shown in the GUI Results area."""
+    return {
+        "total_space_gb": model.total_space_gb,
+        "free_space_gb": model.current_free_space_gb,
+        "used_space_gb": model.get_used_space_gb(),
+        "free_percentage": model.get_free_percentage(),
+        "used_percentage": model.get_used_percentage(),
+        "target_free_percentage": model.target_free_percentage,
+        "additional_space_needed_gb": model.get_additional_space_needed_gb(),
+        "result_text": make_result_text(model) if model.total_space_gb else "",
+    }
+
+def calculate_volume(volume, unit="GB", render_email=False):
+    """Returns the figures for one volume (and its email when requested and possible)."""
+    try:
+        model = volume_to_model(volume, unit)
+    except ValueError as e:
+        return {"error": str(e)}
+    result = model_figures(model)
+    if render_email:
+        server = parse_text(volume.get("server"))
+        name = parse_text(volume.get("volume"))
+        client = parse_text(volume.get("client"))
+        if server and name and client:
+            display_unit = volume.get("unit", unit)
+            result["subject"] = make_email_subject(client, server, name)
+            result["body"] = make_email_body(server, name, model, display_unit, display_unit, display_unit,
+                                             cleanup_ran=parse_bool(volume.get("cleanup_ran")))
+    return result
+
+@instrumented("service.volume")
+def handle_volume(payload):
+    result = calculate_volume(payload)
+    return (400 if "error" in result else 200), result
+
+@instrumented("service.batch")
+def handle_batch(payload):
+    if not isinstance(payload, dict) or not isinstance(payload.get("volumes"), list):
+        return 400, {"error": 'expected {"volumes": [...]}'}
+    unit = payload.get("unit", "GB")
+    return 200, {"results": [calculate_volume(volume, unit, render_email=True) for volume in payload["volumes"]]}
+
+ROUTES = {
+    "/v1/volume": handle_volume,
+    "/v1/batch": handle_batch,
+}
+
+##################################################
+# Response Cache
+##################################################
+class LRUCache:
+    """Thread-safe LRU of encoded responses keyed on (path, request body).
+
+    Holds at most `max_entries` entries and `max_bytes` of request and
+    response bodies; entries over MAX_CACHED_ENTRY_BYTES are not cached.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _entry_bytes(key, value):
+        return len(key[1]) + len(value[1])
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, value):
+        size = self._entry_bytes(key, value)
+        if self.max_entries <= 0 or size > min(self.max_bytes, MAX_CACHED_ENTRY_BYTES):
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= self._entry_bytes(key, old)
+            self._entries[key] = value
+            self.size_bytes += size
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                old_key, old_value = self._entries.popitem(last=False)
+                self.size_bytes -= self._entry_bytes(old_key, old_value)
+
+##################################################
+# HTTP Server
+##################################################
+class CalculatorRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    timeout = KEEP_ALIVE_TIMEOUT  # idle keep-alive connections give their worker back
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    server_version = "DiskSpaceCalculator"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data).encode("utf-8"))
+
+    def do_GET(self):
+        if self.path == "/health":
+            cache = self.server.cache
+            self._send_json(200, {"status": "ok", "cache_hits": cache.hits, "cache_misses": cache.misses,
+                                  "cache_bytes": cache.size_bytes})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        handler = ROUTES.get(self.path)
+        length = self.headers.get("Content-Length", "0").strip()
+        if not (length.isascii() and length.isdigit()):
+            # The body's extent is unknown, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": "request body too large"})
+            return
+        raw = self.rfile.read(length)
+        if handler is None:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        key = (self.path, raw)
+        cached = self.server.cache.get(key)
+        if cached is not None:
+            status, body = cached
+            self._send(status, body)
+            return
+
+        try:
+            payload = json.loads(raw, parse_constant=_reject_constant)
+        except ValueError:
+            self._send_json(400, {"error": "request body must be JSON"})
+            return
+        status, data = handler(payload)
+        body = json.dumps(data).encode("utf-8")
+        self.server.cache.put(key, (status, body))
+        self._send(status, body)
+
+class CalculatorServer(HTTPServer):
+    """HTTP server with a fixed worker pool fed by a bounded connection queue."""
+
+    daemon_threads = True
+
+    def __init__(self, address, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE,
+                 cache_size=DEFAULT_CACHE, verbose=False, cache_bytes=DEFAULT_CACHE_BYTES):
+        super().__init__(address, CalculatorRequestHandler)
+        self.cache = LRUCache(cache_size, cache_bytes)
+        self.verbose = verbose
+        self._requests = queue.Queue(maxsize=queue_size)
+        self._workers = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def _worker(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        try:
+            self._requests.put_nowait((request, client_address))
+        except queue.Full:
+            # Shed load instead of letting the backlog grow without bound
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(None)
+
+##################################################
+# Command Line
+##################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Disk Space Calculator results over local HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker threads")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE, help="Connections waiting for a worker before 503s")
+    parser.add_argument("--cache", type=int, default=DEFAULT_CACHE, help="Cached responses (0 disables)")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_CACHE_BYTES / (1024 * 1024),
+                        help="Memory limit of the response cache in MiB")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    server = CalculatorServer((args.host, args.port), args.workers, args.queue, args.cache, args.verbose,
+                              int(args.cache_mb * 1024 * 1024))
+    print(f"Serving on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""Find where the additional space for a volume could be reclaimed.
+
+Walks a volume with a pool of os.scandir worker threads and reports the
+largest directories, files not modified for --old-days and known junk
+(temp files, dumps, recycle bins, caches). Junk and old files count as
+reclaimable; once they cover the space needed to reach the target, the walk
+stops early.
+
+With --cache, each directory's listing is stored keyed on the directory's
+mtime, so a repeat scan only lists directories whose entries changed. Files
+rewritten in place do not change their directory's mtime, so every cached
+candidate file is stat'ed again before it is counted.
+
+Usage:
+    python cleanup_analyzer.py /data --target 15 [--old-days 180] [--cache scan-cache.json]
+    python cleanup_analyzer.py /data --needed 200G
+"""
+import argparse
+import fnmatch
+import heapq
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from disk_space_core import BYTES_PER_GB, parse_size_gb
+from instrumentation import instrumented
+from volume_scanner import scan_to_model, scan_volumes
+
+DEFAULT_WORKERS = 8
+DEFAULT_OLD_DAYS = 180
+DEFAULT_TOP = 20
+# Smaller files are summed per directory rather than listed (or cached) one by one
+MIN_CANDIDATE_BYTES = 1024 * 1024
+CACHE_VERSION = 1
+
+# Matched case-insensitively against the file or directory name
+JUNK_FILE_PATTERNS = [
+    "*.tmp", "*.temp", "*.bak", "*.old", "*.dmp", "*.mdmp", "*.chk", "*.log.[0-9]*",
+    "*.log.gz", "*~", "core", "core.[0-9]*", "thumbs.db", ".ds_store", "hiberfil.sys.bak",
+]
+JUNK_DIR_PATTERNS = [
+    "$recycle.bin", "recycler", ".trash", ".trash-*", "temp", "tmp", "__pycache__",
+    ".cache", "windows.old", "minidump", "crashdumps", "softwaredistribution",
+]
+
+Candidate = namedtuple("Candidate", ["path", "size_bytes", "mtime", "reason"])
+CleanupReport = namedtuple("CleanupReport", [
+    "root", "needed_bytes", "reclaimable_bytes", "stopped_early", "scanned_bytes", "directories",
+    "cached_directories", "junk", "old_files", "largest_directories", "errors",
+])
+
+def _matches(name, patterns):
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+##################################################
+# Directory Listings
+##################################################
+def _list_directory(path, min_size):
+    """Returns (subdirectory names, [(name, size, mtime)] of larger files, bytes in smaller files)."""
+    subdirs = []
+    files = []
+    small_bytes = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    if st.st_size >= min_size or _matches(entry.name, JUNK_FILE_PATTERNS):
+                        files.append((entry.name, st.st_size, st.st_mtime))
+                    else:
+                        small_bytes += st.st_size
+            except OSError:
+                continue  # vanished or unreadable entry
+    return subdirs, files, small_bytes
+
+def _refresh_listing(path, listing, min_size):
+    """Re-stats the files of a cached listing, so files changed in place show their current size and mtime."""
+    subdirs, files, small_bytes = listing
+    current = []
+    for name, _, _ in files:
+        try:
+            st = os.stat(os.path.join(path, name), follow_symlinks=False)
+        except OSError:
+            continue  # deleted since the listing was cached
+        if st.st_size >= min_size or _matches(name, JUNK_FILE_PATTERNS):
+            current.append((name, st.st_size, st.st_mtime))
+        else:
+            small_bytes += st.st_size
+    return subdirs, current, small_bytes
+
+class ListingCache:
+    """Directory listings keyed on path and validated by the directory's mtime."""
+
+    def __init__(self, path=None, min_size=MIN_CANDIDATE_BYTES):
+        self.path = path
+        self.min_size = min_size
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            # Listings made with other settings are not reusable
+            if data.get("version") == CACHE_VERSION and data.get("min_size") == min_size:
+                self.entries = data.get("directories", {})
+
+    def get(self, path, mtime_ns):
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        return entry[1], [tuple(f) for f in entry[2]], entry[3]
+
+    def put(self, path, mtime_ns, listing):
+        subdirs, files, small_bytes = listing
+        self.entries[path] = [mtime_ns, subdirs, files, small_bytes]
+
+    def prune(self, root, visited):
+        """Drops listings under `root` that a complete walk did not visit (deleted directories)."""
+        prefix = os.path.join(root, "")
+        for path in list(self.entries):
+            if (path == root or path.startswith(prefix)) and path not in visited:
+                del self.entries[path]
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "min_size": self.min_size, "directories": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+##################################################
+# Walk
+##################################################
+class _Walk:
+    def __init__(self, root, needed_bytes, old_before, min_size, cache, same_device):
+        self.root = root
+        self.needed_bytes = needed_bytes
+        self.old_before = old_before
+        self.min_size = min_size
+        self.cache = cache
+        self.device = os.stat(root).st_dev if same_device else None
+        self.pending = queue.Queue()
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        # path -> bytes directly inside it
+        self.own_bytes = {}
+        self.junk_dirs = []
+        self.junk_files = []
+        self.old_files = []
+        self.reclaimable_bytes = 0
+        self.cached_directories = 0
+        self.errors = []
+
+    def worker(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            try:
+                if not self.stop.is_set():
+                    self.visit(*item)
+            finally:
+                self.pending.task_done()
+
+    def visit(self, path, in_junk):
+        try:
+            st = os.stat(path, follow_symlinks=False)
+            if self.device is not None and st.st_dev != self.device:
+                return  # another filesystem mounted inside this volume
+            listing = self.cache.get(path, st.st_mtime_ns)
+            cached = listing is not None
+            if cached:
+                listing = _refresh_listing(path, listing, self.min_size)
+            else:
+                listing = _list_directory(path, self.min_size)
+        except OSError as e:
+            with self.lock:
+                self.errors.append(f"{path}: {e.strerror or e}")
+            return
+
+        subdirs, files, small_bytes = listing
+        own = small_bytes
+        reclaimed = small_bytes if in_junk else 0
+        junk_files = []
+        old_files = []
+        for name, size, mtime in files:
+            own += size
+            if in_junk:
+                reclaimed += size
+            elif _matches(name, JUNK_FILE_PATTERNS):
+                junk_files.append(Candidate(os.path.join(path, name), size, mtime, "junk"))
+                reclaimed += size
+            elif mtime < self.old_before:
+                old_files.append(Candidate(os.path.join(path, name), size, mtime, "old"))
+                reclaimed += size
+
+        children = []
+        junk_roots = []
+        for name in subdirs:
+            child = os.path.join(path, name)
+            child_junk = in_junk or _matches(name, JUNK_DIR_PATTERNS)
+            if child_junk and not in_junk:
+                junk_roots.append(child)
+            children.append((child, child_junk))
+
+        with self.lock:
+            self.cache.put(path, st.st_mtime_ns, listing)
+            self.own_bytes[path] = own
+            self.cached_directories += cached
+            self.junk_dirs.extend(junk_roots)
+            self.junk_files.extend(junk_files)
+            self.old_files.extend(old_files)
+            self.reclaimable_bytes += reclaimed
+            if self.needed_bytes is not None and self.reclaimable_bytes >= self.needed_bytes:
+                self.stop.set()
+        if not self.stop.is_set():
+            for child in children:
+                self.pending.put(child)
+
+    def subtree_bytes(self):
+        """Rolls the per-directory byte counts up to every visited ancestor."""
+        totals = dict(self.own_bytes)
+        # Deepest first, so each directory is complete before it is added to its parent
+        for path in sorted(self.own_bytes, key=lambda p: p.count(os.sep), reverse=True):
+            if path == self.root:
+                continue
+            parent = os.path.dirname(path)
+            if parent in totals:
+                totals[parent] += totals[path]
+        return totals
+
+@instrumented("cleanup.analyze")
+def analyze(root, needed_gb=None, old_days=DEFAULT_OLD_DAYS, workers=DEFAULT_WORKERS, top=DEFAULT_TOP,
+            cache_path=None, min_size=MIN_CANDIDATE_BYTES, same_device=True, now=None):
+    """Walks `root` and returns a CleanupReport.
+
+    The walk stops as soon as junk and old files add up to `needed_gb`
+    (pass None to walk everything); the largest directories are then the
+    largest seen so far.
+    """
+    root = os.path.abspath(root)
+    needed_bytes = None if needed_gb is None else needed_gb * BYTES_PER_GB
+    old_before = (time.time() if now is None else now) - old_days * 86400
+    cache = ListingCache(cache_path, min_size)
+    walk = _Walk(root, needed_bytes, old_before, min_size, cache, same_device)
+
+    threads = [threading.Thread(target=walk.worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    walk.pending.put((root, _matches(os.path.basename(root), JUNK_DIR_PATTERNS)))
+    walk.pending.join()
+    for _ in threads:
+        walk.pending.put(None)
+    for thread in threads:
+        thread.join()
+
+    stopped_early = walk.stop.is_set()
+    if not stopped_early:
+        cache.prune(root, walk.own_bytes)
+    cache.save()
+
+    totals = walk.subtree_bytes()
+    junk = walk.junk_files + [Candidate(path, totals[path], None, "junk directory")
+                              for path in walk.junk_dirs if path in totals]
+    largest = heapq.nlargest(top, ((size, path) for path, size in totals.items() if path != root))
+    return CleanupReport(
+        root=root,
+        needed_bytes=needed_bytes,
+        reclaimable_bytes=walk.reclaimable_bytes,
+        stopped_early=stopped_early,
+        scanned_bytes=totals.get(root, 0),
+        directories=len(walk.own_bytes),
+        cached_directories=walk.cached_directories,
+        junk=sorted(junk, key=lambda c: c.size_bytes, reverse=True),
+        old_files=sorted(walk.old_files, key=lambda c: c.size_bytes, reverse=True),
+        largest_directories=[(path, size) for size, path in largest],
+        errors=walk.errors,
+    )
+
+##################################################
+# Reporting
+##################################################
+def _gb(size_bytes):
+    # Small candidates would all print as 0.00 GB
+    if size_bytes < BYTES_PER_GB:
+        return f"{size_bytes / (1024 * 1024):.2f} MB"
+    return f"{size_bytes / BYTES_PER_GB:.2f} GB"
+
+def format_report(report, limit=DEFAULT_TOP):
+    """Renders a plain-text summary suitable for pasting into an alert email."""
+    lines = [f"Cleanup candidates on {report.root}:"]
+    if report.needed_bytes is not None:
+        verdict = "enough" if report.reclaimable_bytes >= report.needed_bytes else "not enough"
+        lines.append(f"Found {_gb(report.reclaimable_bytes)} reclaimable of {_gb(report.needed_bytes)} needed ({verdict}).")
+    else:
+        lines.append(f"Found {_gb(report.reclaimable_bytes)} reclaimable.")
+    if report.stopped_early:
+        lines.append("The scan stopped once enough space was found; directory sizes are partial.")
+
+    for title, candidates in (("Junk", report.junk), ("Old files", report.old_files)):
+        if candidates:
+            lines.append("")
+            lines.append(f"{title}:")
+            for candidate in candidates[:limit]:
+                lines.append(f"  {_gb(candidate.size_bytes):>12}  {candidate.path}")
+            if len(candidates) > limit:
+                lines.append(f"  ... and {len(candidates) - limit} more")
+    if report.largest_directories:
+        lines.append("")
+        lines.append("Largest directories:")
+        for path, size in report.largest_directories[:limit]:
+            lines.append(f"  {_gb(size):>12}  {path}")
+    return "\n".join(lines)
+
+##################################################
+# Command Line
+##################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find reclaimable space on a volume.")
+    parser.add_argument("path", help="Volume or directory to analyze")
+    parser.add_argument("--target", type=float, help="Target free space %%; stop once enough space is found to reach it")
+    parser.add_argument("--needed", help="Space to find, e.g. 200G (overrides --target)")
+    parser.add_argument("--old-days", type=float, default=DEFAULT_OLD_DAYS, help="Files unmodified for this many days count as old")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Entries to list per section")
+    parser.add_argument("--cache", help="Listing cache file for incremental rescans")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and rebuild the cache")
+    parser.add_argument("--cross-mounts", action="store_true", help="Descend into other filesystems mounted below PATH")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.path):
+        parser.error(f"{args.path}: not an existing directory")
+
+    needed_gb = None
+    if args.needed:
+        needed_gb = parse_size_gb(args.needed)
+        if needed_gb is None:
+            parser.error(f"Invalid size: {args.needed}")
+    elif args.target is not None:
+        scan = scan_volumes([args.path])[0]
+        if scan.error is not None:
+            parser.error(f"{args.path}: {scan.error}")
+        needed_gb = scan_to_model(scan, args.target).get_additional_space_needed_gb()
+        if not needed_gb:
+            print(f"{args.path} already meets {args.target:.2f}% free space; listing candidates anyway.", file=sys.stderr)
+            needed_gb = None
+
+    if args.no_cache and args.cache and os.path.exists(args.cache):
+        os.remove(args.cache)
+    report = analyze(args.path, needed_gb, args.old_days, args.workers, args.top, args.cache,
+                     same_device=not args.cross_mounts)
+    print(format_report(report, args.top))
+    for error in report.errors:
+        print(error, file=sys.stderr)
+    print(f"Scanned {report.directories} directories ({report.cached_directories} from cache)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""Consolidated low disk space reports, one per client.
+
+Reads the same CSV or JSONL rows as batch_email.py, groups the volumes by
+client abbreviation and server, and renders one digest per client with a
+make_email_body-style section for every volume plus per-server and overall
+totals. Clients are rendered on a process pool, one task per client, and
+written in sorted client order, so the output is identical for any number of
+workers and any input row order.
+
+Usage:
+    python client_digest.py alerts.csv -o digests.jsonl [--workers 8]
+    python client_digest.py alerts.jsonl --format eml -o outbox/
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from email.message import EmailMessage
+from itertools import groupby
+
+from batch_email import InvalidRow, detect_format, parse_bool, parse_text, read_rows, row_to_model
+from disk_space_core import SUPPORTED_UNITS, convert_from_gb, make_volume_details
+from instrumentation import instrumented
+
+DIGEST_FIELDS = ["client", "subject", "volumes", "servers", "additional_space_needed_gb", "body"]
+OUTPUT_FORMATS = ["csv", "jsonl", "eml"]
+
+##################################################
+# Rendering
+##################################################
+def _count(count, noun):
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
+
+def make_digest_subject(client_abbreviation, volume_count, server_count):
+    """Builds the subject line of a client digest."""
+    return (f"[{client_abbreviation}] Low Disk Space Digest: "
+            f"{_count(volume_count, 'Volume')} on {_count(server_count, 'Server')}")
+
+def _volume_section(volume_name, model, unit):
+    additional_needed_gb = model.get_additional_space_needed_gb()
+    additional_str = f"{additional_needed_gb} GB" if additional_needed_gb else "0 GB"
+    target_perc = model.target_free_percentage if model.target_free_percentage else 0.0
+    details = make_volume_details(model, unit, unit, unit).replace("\n", "\n    ")
+    return (
+        f"  Volume {volume_name}\n"
+        f"    {details}\n"
+        f"    Adding or Clearing {additional_str} will get the volume to {target_perc:.2f}% free space.\n"
+    )
+
+@instrumented("digest.render_client")
+def render_client_digest(client, rows, unit="GB"):
+    """Renders one client's rows into (digest dict or None, [error messages]).
+
+    `rows` are (line number, row) pairs; volumes are ordered by server and
+    volume name so the digest does not depend on input order.
+    """
+    volumes = []
+    errors = []
+    for line_number, row in rows:
+        server = parse_text(row.get("server"))
+        volume = parse_text(row.get("volume"))
+        if not server or not volume:
+            errors.append(f"Row {line_number}: skipped (server and volume are required)")
+            continue
+        try:
+            model = row_to_model(row, unit)
+        except ValueError as e:
+            errors.append(f"Row {line_number}: skipped ({e})")
+            continue
+        volumes.append((server, volume, line_number, model, parse_bool(row.get("cleanup_ran"))))
+    if not volumes:
+        return None, errors
+    volumes.sort(key=lambda v: (v[0], v[1], v[2]))
+
+    sections = []
+    total_gb = 0.0
+    used_gb = 0.0
+    total_needed = 0
+    server_count = 0
+    for server, server_volumes in groupby(volumes, key=lambda v: v[0]):
+        server_count += 1
+        server_needed = 0
+        count = 0
+        sections.append(f"Server {server}\n")
+        for _, volume, _, model, _ in server_volumes:
+            server_needed += model.get_additional_space_needed_gb() or 0
+            count += 1
+            total_gb += model.total_space_gb
+            used_gb += model.get_used_space_gb()
+            sections.append(_volume_section(volume, model, unit))
+        total_needed += server_needed
+        sections.append(f"  Server total: {server_needed} GB to add across {_count(count, 'volume')}\n\n")
+
+    # Ask about cleanup unless it already ran on every volume
+    cleanup_ran = all(v[4] for v in volumes)
+    status_line = (
+        "After running cleanup tools, we were unable to free enough space to clear these alerts.\n\n"
+        if cleanup_ran else
+        "Would you like us to run clean up tools or add additional space?\n\n"
+    )
+    used_pct = used_gb / total_gb * 100 if total_gb else 0.0
+    body = (
+        "Hello,\n\n"
+        f"We received low space alerts for {_count(len(volumes), 'volume')} on {_count(server_count, 'server')}.\n\n"
+        + "".join(sections) +
+        "Totals:\n"
+        f"Total Capacity: {convert_from_gb(total_gb, unit):.2f} {unit}\n"
+        f"Total Used: {convert_from_gb(used_gb, unit):.2f} {unit} ({used_pct:.2f}%)\n"
+        f"Adding or Clearing {total_needed} GB in total will get every volume to its target free space.\n\n"
+        f"{status_line}"
+        "Please let us know how you would like to proceed.\n\n"
+        "Thank you"
+    )
+    digest = {
+        "client": client,
+        "subject": make_digest_subject(client, len(volumes), server_count),
+        "volumes": len(volumes),
+        "servers": server_count,
+        "additional_space_needed_gb": total_needed,
+        "body": body,
+    }
+    return digest, errors
+
+def _render_job(job):
+    return render_client_digest(*job)
+
+##################################################
+# Grouping and Sharding
+##################################################
+def group_by_client(rows):
+    """Returns {client: [(line number, row), ...]}; rows without a client go under ''."""
+    clients = {}
+    for line_number, row in enumerate(rows, start=1):
+        client = parse_text(row.get("client"))
+        clients.setdefault(client, []).append((line_number, row))
+    return clients
+
+def render_digests(rows, unit="GB", workers=None, errors=None):
+    """Yields one digest per client in client order, rendering clients on `workers` processes."""
+    clients = group_by_client(rows)
+    missing = clients.pop("", [])
+    if errors is not None:
+        for line_number, row in missing:
+            reason = row.error if isinstance(row, InvalidRow) else "client is required"
+            errors.write(f"Row {line_number}: skipped ({reason})\n")
+    jobs = [(client, clients[client], unit) for client in sorted(clients)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(jobs) < 2:
+        results = map(_render_job, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+        # Several small clients per task keeps pickling overhead down; map keeps job order
+        chunksize = max(1, len(jobs) // (workers * 4))
+        results = executor.map(_render_job, jobs, chunksize=chunksize)
+    try:
+        for digest, job_errors in results:
+            if errors is not None:
+                for message in job_errors:
+                    errors.write(message + "\n")
+            if digest is not None:
+                yield digest
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+##################################################
+# Writers
+##################################################
+def write_csv(digests, stream):
+    writer = csv.DictWriter(stream, fieldnames=DIGEST_FIELDS)
+    writer.writeheader()
+    count = 0
+    for digest in digests:
+        writer.writerow(digest)
+        count += 1
+    return count
+
+def write_jsonl(digests, stream):
+    count = 0
+    for digest in digests:
+        stream.write(json.dumps(digest) + "\n")
+        count += 1
+    return count
+
+def write_eml(digests, directory):
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for digest in digests:
+        message = EmailMessage()
+        message["Subject"] = digest["subject"]
+        message.set_content(digest["body"])
+        filename = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{count:06d}_{digest['client']}") + ".eml"
+        with open(os.path.join(directory, filename), "wb") as f:
+            f.write(bytes(message))
+        count += 1
+    return count
+
+##################################################
+# Command Line
+##################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate one consolidated low disk space report per client.")
+    parser.add_argument("input", help="CSV or JSONL file of alerts ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output file or .eml directory ('-' for stdout)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"])
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: from output extension, else jsonl)")
+    parser.add_argument("--unit", choices=SUPPORTED_UNITS, default="GB", help="Unit of total and free values without a suffix, also used in the report")
+    parser.add_argument("--workers", type=int, help="Rendering processes (default: one per CPU core)")
+    args = parser.parse_args(argv)
+
+    input_format = args.input_format or detect_format(args.input, ["csv", "jsonl"], "csv")
+    output_format = args.format or detect_format(args.output, OUTPUT_FORMATS, "jsonl")
+    if output_format == "eml" and args.output == "-":
+        parser.error("--format eml requires an output directory")
+
+    in_stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        digests = render_digests(read_rows(in_stream, input_format), args.unit, args.workers, errors=sys.stderr)
+        if output_format == "eml":
+            count = write_eml(digests, args.output)
+        else:
+            writer = write_csv if output_format == "csv" else write_jsonl
+            if args.output == "-":
+                count = writer(digests, sys.stdout)
+            else:
+                with open(args.output, "w", newline="", encoding="utf-8") as out_stream:
+                    count = writer(digests, out_stream)
+    finally:
+        if in_stream is not sys.stdin:
+            in_stream.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} client digests in {elapsed:.2f} s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,504 @@
+"""Headless core of the Disk Space Calculator.
+
+Holds the model, unit conversions and email rendering. Nothing here imports
+tkinter, so scripts and cron jobs can use it on display-less hosts; the GUI
+in DiskSpaceCalculator.py is only loaded when the app is launched.
+"""
+import math
+from array import array
+from collections import namedtuple
+
+from instrumentation import instrumented
+
+##################################################
+# Constants
+##################################################
+GB_PER_TB = 1024
+BYTES_PER_GB = 1024 ** 3
+
+# Bytes per unit. Like GB_PER_TB, the KB..PB names follow the Windows/df
+# convention of powers of 1024; KiB..PiB are the explicit IEC spellings.
+UNIT_BYTES = {
+    "B": 1,
+    "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4, "PB": 1024 ** 5,
+    "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4, "PiB": 1024 ** 5,
+}
+SUPPORTED_UNITS = list(UNIT_BYTES)
+
+# SI meaning of the KB..PB names (and df -H style single letters), used by
+# the size parser when decimal=True
+DECIMAL_UNIT_BYTES = {
+    "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4, "PB": 1000 ** 5,
+}
+
+##################################################
+# Optional Dependencies
+##################################################
+_numpy = None
+
+def load_numpy():
+    """Imports NumPy on first use so importing this module stays cheap."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # NumPy is optional; FleetModel falls back to array('d')
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+##################################################
+# Model Definition
+##################################################
+class DiskSpaceModel:
+    """Disk space inputs plus derived values that are computed lazily.
+
+    Derived values are cached until total, free or target space changes.
+    Observers registered with add_observer are called with the model whenever
+    an input change alters the derived values (or the target).
+    """
+
+    def __init__(self):
+        # All values are stored internally in GB
+        self._total_space_gb = 0.0
+        self._current_free_space_gb = 0.0
+        self._target_free_percentage = None
+        self._dirty = True
+        self._derived = None
+        self._observers = []
+        self._observed = None
+
+    @property
+    def total_space_gb(self):
+        return self._total_space_gb
+
+    @total_space_gb.setter
+    def total_space_gb(self, value_gb):
+        self._total_space_gb = value_gb
+        self._invalidate()
+
+    @property
+    def current_free_space_gb(self):
+        return self._current_free_space_gb
+
+    @current_free_space_gb.setter
+    def current_free_space_gb(self, value_gb):
+        self._current_free_space_gb = value_gb
+        self._invalidate()
+
+    @property
+    def target_free_percentage(self):
+        return self._target_free_percentage
+
+    @target_free_percentage.setter
+    def target_free_percentage(self, value):
+        self._target_free_percentage = value
+        self._invalidate()
+
+    def set_total_space_gb(self, value_gb):
+        self._total_space_gb = value_gb
+        self._invalidate()
+
+    def set_free_space_gb(self, value_gb):
+        self._current_free_space_gb = value_gb
+        self._invalidate()
+
+    def add_observer(self, callback):
+        """Calls callback(model) whenever the derived values change."""
+        self._observers.append(callback)
+        self._observed = self._observed_values()
+
+    def remove_observer(self, callback):
+        self._observers.remove(callback)
+
+    def _invalidate(self):
+        self._dirty = True
+        if self._observers:
+            observed = self._observed_values()
+            if observed != self._observed:
+                self._observed = observed
+                for callback in list(self._observers):
+                    callback(self)
+
+    def _observed_values(self):
+        # Views show nothing while total is zero, so entering or leaving that state is a change too
+        return self._derived_values() + (self._target_free_percentage, self._total_space_gb == 0)
+
+    def _derived_values(self):
+        if self._dirty:
+            T = self._total_space_gb
+            free_percentage = 0 if T == 0 else (self._current_free_space_gb / T) * 100
+            self._derived = (free_percentage, 100 - free_percentage, self._calculate_additional_space_needed_gb())
+            self._dirty = False
+        return self._derived
+
+    def get_used_space_gb(self):
+        return self._total_space_gb - self._current_free_space_gb
+
+    def get_free_percentage(self):
+        return (self._derived if not self._dirty else self._derived_values())[0]
+
+    def get_used_percentage(self):
+        return (self._derived if not self._dirty else self._derived_values())[1]
+
+    def get_additional_space_needed_gb(self):
+        return (self._derived if not self._dirty else self._derived_values())[2]
+
+    def _calculate_additional_space_needed_gb(self):
+        if self._target_free_percentage is None or self._total_space_gb == 0:
+            return None
+        P = self._target_free_percentage / 100.0
+        T = self._total_space_gb
+        F = self._current_free_space_gb
+
+        if P >= 1.0:
+            return None  # Cannot have 100% or more free space
+
+        denominator = 1.0 - P
+        if denominator == 0:
+            return None  # Prevent division by zero
+
+        A = (T * P - F) / denominator
+
+        if A > 0:
+            return math.ceil(A)
+        else:
+            return 0
+
+def _as_double_array(column):
+    if isinstance(column, array) and column.typecode == 'd':
+        return column
+    return array('d', column)
+
+FleetResult = namedtuple("FleetResult", ["free_percentage", "used_percentage", "additional_space_needed_gb"])
+
+class FleetModel:
+    """Array-backed DiskSpaceModel for many volumes at once.
+
+    Columns are NumPy arrays when NumPy is installed, otherwise array('d').
+    A NaN in the additional space column marks a volume for which
+    DiskSpaceModel.get_additional_space_needed_gb would return None.
+    """
+
+    def __init__(self, total_space_gb, free_space_gb, target_free_percentage=None):
+        np = load_numpy()
+        count = len(total_space_gb)
+        if len(free_space_gb) != count:
+            raise ValueError("Total and free space columns must be the same length.")
+
+        # A single target (or None) applies to every volume
+        if target_free_percentage is None or isinstance(target_free_percentage, (int, float)):
+            target_free_percentage = [target_free_percentage] * count
+        elif len(target_free_percentage) != count:
+            raise ValueError("Target percentage column must match the number of volumes.")
+
+        if isinstance(target_free_percentage, (list, tuple)):
+            targets = [math.nan if t is None else t for t in target_free_percentage]
+        else:
+            # Float buffers (array, memoryview, ndarray) already use NaN for "no target"
+            targets = target_free_percentage
+
+        # Float64 buffers are used in place rather than copied
+        if np is not None:
+            self.total_space_gb = np.asarray(total_space_gb, dtype=np.float64)
+            self.current_free_space_gb = np.asarray(free_space_gb, dtype=np.float64)
+            self.target_free_percentage = np.asarray(targets, dtype=np.float64)
+        else:
+            self.total_space_gb = _as_double_array(total_space_gb)
+            self.current_free_space_gb = _as_double_array(free_space_gb)
+            self.target_free_percentage = _as_double_array(targets)
+
+    @classmethod
+    def from_models(cls, models):
+        """Builds a fleet from existing DiskSpaceModel instances."""
+        models = list(models)
+        return cls(
+            [m.total_space_gb for m in models],
+            [m.current_free_space_gb for m in models],
+            [m.target_free_percentage for m in models],
+        )
+
+    def __len__(self):
+        return len(self.total_space_gb)
+
+    @instrumented("fleet.calculate")
+    def calculate(self):
+        """Returns free %, used % and additional GB columns for every volume."""
+        if load_numpy() is not None:
+            return self._calculate_numpy()
+        return self._calculate_array()
+
+    def to_rows(self):
+        """Returns (free %, used %, additional GB) tuples matching the scalar model."""
+        result = self.calculate()
+        return [
+            (free_pct, used_pct, None if math.isnan(additional) else int(additional))
+            for free_pct, used_pct, additional in zip(
+                list(result.free_percentage),
+                list(result.used_percentage),
+                list(result.additional_space_needed_gb),
+            )
+        ]
+
+    def _calculate_numpy(self):
+        np = load_numpy()
+        T = self.total_space_gb
+        F = self.current_free_space_gb
+        # Same operation order as DiskSpaceModel so results match bit for bit
+        with np.errstate(divide="ignore", invalid="ignore"):
+            free_pct = np.where(T == 0, 0.0, (F / T) * 100)
+            used_pct = 100 - free_pct
+
+            P = self.target_free_percentage / 100.0
+            A = (T * P - F) / (1.0 - P)
+        additional = np.where(A > 0, np.ceil(A), 0.0)
+        invalid = np.isnan(P) | (T == 0) | (P >= 1.0)
+        additional[invalid] = np.nan
+        return FleetResult(free_pct, used_pct, additional)
+
+    def _calculate_array(self):
+        count = len(self)
+        free_pct = array('d', bytes(8 * count))
+        used_pct = array('d', bytes(8 * count))
+        additional = array('d', bytes(8 * count))
+        for i, (T, F, target) in enumerate(zip(self.total_space_gb, self.current_free_space_gb, self.target_free_percentage)):
+            free_pct[i] = 0 if T == 0 else (F / T) * 100
+            used_pct[i] = 100 - free_pct[i]
+
+            P = target / 100.0
+            if math.isnan(P) or T == 0 or P >= 1.0:
+                additional[i] = math.nan
+                continue
+            A = (T * P - F) / (1.0 - P)
+            additional[i] = math.ceil(A) if A > 0 else 0
+        return FleetResult(free_pct, used_pct, additional)
+
+##################################################
+# Helper Functions
+##################################################
+def safe_float(s):
+    s = s.strip()
+    if s == '' or s == '.':
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+def convert_to_gb(value, unit):
+    """Converts value to GB based on the unit."""
+    if unit == "GB":
+        return value
+    try:
+        return value * _GB_PER_UNIT[unit]
+    except KeyError:
+        raise ValueError(f"Unsupported unit: {unit}") from None
+
+def convert_from_gb(value_gb, unit):
+    """Converts value from GB to the specified unit."""
+    if unit == "GB":
+        return value_gb
+    try:
+        return value_gb / _GB_PER_UNIT[unit]
+    except KeyError:
+        raise ValueError(f"Unsupported unit: {unit}") from None
+
+##################################################
+# Size Parsing
+##################################################
+# All factors are powers of two relative to GB, so binary conversions are exact
+_GB_PER_UNIT = {unit: size / BYTES_PER_GB for unit, size in UNIT_BYTES.items()}
+
+def _build_suffix_table(decimal):
+    """Maps every accepted (lower-case) suffix to GB per unit."""
+    table = {}
+    for unit, size in UNIT_BYTES.items():
+        table[unit.lower()] = size / BYTES_PER_GB
+    table["bytes"] = table["byte"] = table["b"]
+    # df -h / ls -h style single letters, and PowerShell style "KiB" without the B
+    for letter in "kmgtp":
+        table[letter] = table[letter + "b"]
+        table[letter + "i"] = table[letter + "ib"]
+    if decimal:
+        for unit, size in DECIMAL_UNIT_BYTES.items():
+            table[unit.lower()] = table[unit[0].lower()] = size / BYTES_PER_GB
+    return table
+
+_BINARY_SUFFIXES = _build_suffix_table(decimal=False)
+_DECIMAL_SUFFIXES = _build_suffix_table(decimal=True)
+_UNIT_LETTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+def _remove_thousands_separators(number):
+    """Returns `number` without its thousands separators, or None if it has commas elsewhere.
+
+    Commas are only accepted between groups of three digits ("1,024.5"), so a
+    decimal comma such as "1,5" is rejected rather than read as 15.
+    """
+    number = number.strip()
+    if "," not in number:
+        return number
+    whole, _, fraction = number.partition(".")
+    groups = whole.split(",")
+    if not (1 <= len(groups[0]) <= 3 and groups[0].isdigit()):
+        return None
+    if not all(len(group) == 3 and group.isdigit() for group in groups[1:]):
+        return None
+    if fraction and not fraction.isdigit():
+        return None
+    return number.replace(",", "")
+
+def _default_factor(unit):
+    try:
+        return _GB_PER_UNIT[unit]
+    except KeyError:
+        raise ValueError(f"Unsupported unit: {unit}") from None
+
+def split_size(text):
+    """Splits a size such as "1,024.5 GiB" into its number text ("1024.5") and suffix ("GiB").
+
+    The number has its thousands separators removed, and is None if the text
+    has commas anywhere else. The suffix is "" when there is none.
+    """
+    text = text.strip()
+    number = text.rstrip(_UNIT_LETTERS)
+    return _remove_thousands_separators(number), text[len(number):]
+
+def suffix_gb(suffix, decimal=False):
+    """Returns GB per unit for a size suffix ("T", "GiB", "bytes", ...), or None if it is not one."""
+    return (_DECIMAL_SUFFIXES if decimal else _BINARY_SUFFIXES).get(suffix.lower())
+
+def parse_size_gb(text, default_unit="GB", decimal=False):
+    """Parses a human-readable size such as "1.5T", "512 GiB" or "980M" into GB.
+
+    Numbers without a suffix are taken to be in `default_unit` (one of
+    SUPPORTED_UNITS). KB..PB and single-letter suffixes are powers of 1024
+    unless `decimal` is set. Returns None if the text is not a size.
+    """
+    if isinstance(text, (int, float)):
+        value = float(text)
+        if not 0 <= value < math.inf:
+            return None
+        return convert_to_gb(value, default_unit)
+    number, suffix = split_size(text)
+    if suffix:
+        factor = suffix_gb(suffix, decimal)
+        if factor is None:
+            return None
+    else:
+        factor = _default_factor(default_unit)
+    value = None if number is None else safe_float(number)
+    if value is None or not 0 <= value < math.inf:
+        return None
+    return value * factor
+
+def parse_sizes_gb(values, default_unit="GB", decimal=False):
+    """Parses a column of sizes into an array('d') of GB; unparseable entries are NaN."""
+    suffixes = _DECIMAL_SUFFIXES if decimal else _BINARY_SUFFIXES
+    default_factor = _default_factor(default_unit)
+
+    # Locals keep the per-value loop free of global and attribute lookups
+    nan = math.nan
+    inf = math.inf
+    letters = _UNIT_LETTERS
+    get_factor = suffixes.get
+    out = array('d')
+    append = out.append
+    for text in values:
+        if not isinstance(text, str):
+            value = nan if text is None else float(text)
+            append(value * default_factor if 0 <= value < inf else nan)
+            continue
+        text = text.strip()
+        number = text.rstrip(letters)
+        suffix = text[len(number):]
+        factor = get_factor(suffix.lower()) if suffix else default_factor
+        if factor is None:
+            append(nan)
+            continue
+        if "," in number:
+            number = _remove_thousands_separators(number)
+            if number is None:
+                append(nan)
+                continue
+        try:
+            value = float(number)
+        except ValueError:
+            append(nan)
+            continue
+        append(value * factor if 0 <= value < inf else nan)
+    return out
+
+def parse_size_buffer(buffer, default_unit="GB", decimal=False):
+    """Parses newline-separated sizes (str or bytes) into an array('d') of GB."""
+    if isinstance(buffer, (bytes, bytearray, memoryview)):
+        buffer = bytes(buffer).decode("ascii", errors="replace")
+    return parse_sizes_gb(buffer.splitlines(), default_unit, decimal)
+
+def make_result_text(model):
+    """Builds the percentages and target lines shown in the Results area."""
+    free_pct = model.get_free_percentage()
+    used_pct = model.get_used_percentage()
+
+    result_text = f"Current Free Space: {free_pct:.2f}%\n"
+    result_text += f"Current Used Space: {used_pct:.2f}%"
+
+    # Handle Target Percentage
+    if model.target_free_percentage is not None:
+        additional_needed_gb = model.get_additional_space_needed_gb()
+        if additional_needed_gb is not None:
+            if additional_needed_gb > 0:
+                result_text += f"\nYou need to add {additional_needed_gb} GB to reach {model.target_free_percentage:.2f}% free space."
+            else:
+                result_text += f"\nYou have already met or exceeded the target free space of {model.target_free_percentage:.2f}%."
+
+    return result_text
+
+def make_volume_details(model, total_unit, free_unit, used_unit):
+    """Builds the capacity, used/free and percentage lines describing one volume."""
+    used_gb = model.get_used_space_gb()
+    free_gb = model.current_free_space_gb
+
+    total_str = f"{convert_from_gb(model.total_space_gb, total_unit):.2f} {total_unit}"
+    free_str = f"{convert_from_gb(free_gb, free_unit):.2f} {free_unit}"
+    used_str = f"{convert_from_gb(used_gb, used_unit):.2f} {used_unit}"
+
+    free_pct = model.get_free_percentage()
+    used_pct = model.get_used_percentage()
+
+    return (
+        f"Total Capacity: {total_str}\n"
+        f"Total Used/Free: {used_str} / {free_str}\n"
+        f"Percent Used/Free: {used_pct:.2f}% / {free_pct:.2f}%"
+    )
+
+@instrumented("make_email_body")
+def make_email_body(server_name, volume_name, model, total_unit, free_unit, used_unit, cleanup_ran=False):
+    
+    details = make_volume_details(model, total_unit, free_unit, used_unit)
+
+    additional_needed_gb = model.get_additional_space_needed_gb()
+    additional_str = f"{additional_needed_gb} GB" if additional_needed_gb else "0 GB"
+
+    target_perc = model.target_free_percentage if model.target_free_percentage else 0.0
+
+    # Status line changes based on the checkbox
+    status_line = (
+        "After running cleanup tools, we were unable to free enough space to clear the alert.\n\n"
+        if cleanup_ran else
+        "Would you like us to run clean up tools or add additional space?\n\n"
+    )
+
+    return (
+        "Hello,\n\n"
+        f"We received an alert for low space on {server_name} Volume {volume_name}\n\n"
+        "Current volume details:\n"
+        f"{details}\n\n"
+        f"{status_line}"
+        f"Adding or Clearing {additional_str} will get the volume to {target_perc:.2f}% free space.\n\n"
+        "Please let us know how you would like to proceed.\n\n"
+        "Thank you"
+    )
+
+def make_email_subject(client_abbreviation, server_name, volume_name):
+    """Builds the subject line used for low disk space alert emails."""
+    return f"[{client_abbreviation}] Low Disk Space Alert on {server_name} Volume {volume_name}"
@@ -0,0 +1,300 @@
+"""Exact integer-byte arithmetic for the Disk Space Calculator.
+
+DiskSpaceModel keeps float GB, which is fine for a single volume but drifts
+at petabyte scale, and it always rounds the space needed up to a whole GB.
+ExactDiskSpaceModel keeps sizes as integer bytes and the target as a
+Fraction, computes the space needed as an exact rational and rounds it up to
+a selectable granularity: a unit name ("MB", "GB", ...) or a byte count such
+as the volume's allocation unit.
+
+ExactFleet does the same for many volumes on int64 columns (NumPy when
+installed, otherwise array('q') and Python ints). To stay within int64 the
+fleet path holds targets in millionths of a percent; for targets with up to
+six decimals its results equal the scalar model's exactly.
+"""
+import math
+import os
+import shutil
+from array import array
+from collections import namedtuple
+from fractions import Fraction
+
+from disk_space_core import BYTES_PER_GB, UNIT_BYTES, load_numpy, safe_float, split_size, suffix_gb
+from instrumentation import instrumented
+
+DEFAULT_GRANULARITY = "GB"
+DEFAULT_ALLOCATION_UNIT = 4096
+# Fleet targets are stored as integer millionths of a percent
+TARGET_SCALE = 10 ** 6
+# Marks "no answer" (no target, zero total, target >= 100%) in int64 columns
+NO_RESULT = -1
+
+ExactFleetResult = namedtuple("ExactFleetResult", ["free_percentage", "used_percentage", "additional_space_needed_bytes"])
+
+##################################################
+# Conversions
+##################################################
+
+def granularity_bytes(granularity):
+    """Resolves a unit name ("MB", "GB", ...) or a positive byte count to bytes."""
+    if isinstance(granularity, str):
+        try:
+            return UNIT_BYTES[granularity]
+        except KeyError:
+            raise ValueError(f"Unsupported unit: {granularity}") from None
+    if isinstance(granularity, bool) or not isinstance(granularity, int) or granularity <= 0:
+        raise ValueError("Granularity must be a unit name or a positive number of bytes.")
+    return granularity
+
+def exact_percentage(value):
+    """Converts a target percentage to a Fraction, reading floats by their decimal text (15.1 is 151/10).
+
+    Negative targets are rejected, as in the GUI.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError("Target percentage must be finite.")
+        value = repr(value)
+    percentage = Fraction(value)
+    if percentage < 0:
+        raise ValueError("Target percentage cannot be negative.")
+    return percentage
+
+def parse_size_bytes(text, default_unit="GB", decimal=False):
+    """Parses a size such as "1.5T" or "980 MiB" into integer bytes, or None if it is not a size.
+
+    Like parse_size_gb, but the decimal number is read exactly and the result
+    is rounded to the nearest byte.
+    """
+    if isinstance(text, int) and not isinstance(text, bool):
+        return text * granularity_bytes(default_unit) if text >= 0 else None
+    if isinstance(text, float):
+        text = repr(text)
+    number, suffix = split_size(text)
+    if suffix:
+        gb = suffix_gb(suffix, decimal)
+        if gb is None:
+            return None
+        # Every suffix is an exact number of bytes (10**k / 2**30 is exact in a float)
+        factor = round(gb * BYTES_PER_GB)
+    else:
+        factor = granularity_bytes(default_unit)
+    # Only decimal numbers, as parse_size_gb accepts; Fraction alone would also take "1/3"
+    if number is None or safe_float(number) is None:
+        return None
+    try:
+        value = Fraction(number)
+    except ValueError:
+        return None  # nan, inf
+    if value < 0:
+        return None
+    return round(value * factor)
+
+def allocation_unit(path):
+    """Returns the filesystem allocation unit (cluster/fragment size) of the volume holding `path`."""
+    if hasattr(os, "statvfs"):
+        try:
+            return os.statvfs(path).f_frsize or DEFAULT_ALLOCATION_UNIT
+        except OSError:
+            pass
+    return DEFAULT_ALLOCATION_UNIT
+
+##################################################
+# Single Volume
+##################################################
+def _ceil_div(numerator, denominator):
+    return -((-numerator) // denominator)
+
+class ExactDiskSpaceModel:
+    """DiskSpaceModel counterpart holding integer bytes and an exact target.
+
+    The float GB accessors (total_space_gb, get_used_space_gb, ...) let it be
+    passed to make_email_body and make_result_text unchanged.
+    """
+
+    def __init__(self, total_bytes=0, free_bytes=0, target_free_percentage=None,
+                 granularity=DEFAULT_GRANULARITY):
+        self.total_bytes = total_bytes
+        self.free_bytes = free_bytes
+        self.target = exact_percentage(target_free_percentage)
+        self.granularity = granularity_bytes(granularity)
+
+    @classmethod
+    def from_path(cls, path, target_free_percentage=None, granularity=None):
+        """Reads a mounted volume; granularity defaults to its allocation unit."""
+        usage = shutil.disk_usage(path)
+        if granularity is None:
+            granularity = allocation_unit(path)
+        return cls(usage.total, usage.free, target_free_percentage, granularity)
+
+    @property
+    def total_space_gb(self):
+        return self.total_bytes / BYTES_PER_GB
+
+    @property
+    def current_free_space_gb(self):
+        return self.free_bytes / BYTES_PER_GB
+
+    @property
+    def target_free_percentage(self):
+        return None if self.target is None else float(self.target)
+
+    @target_free_percentage.setter
+    def target_free_percentage(self, value):
+        self.target = exact_percentage(value)
+
+    def set_total_bytes(self, value):
+        self.total_bytes = value
+
+    def set_free_bytes(self, value):
+        self.free_bytes = value
+
+    def get_used_bytes(self):
+        return self.total_bytes - self.free_bytes
+
+    def get_used_space_gb(self):
+        return self.get_used_bytes() / BYTES_PER_GB
+
+    def get_free_percentage(self):
+        if self.total_bytes == 0:
+            return 0
+        return float(Fraction(self.free_bytes * 100, self.total_bytes))
+
+    def get_used_percentage(self):
+        if self.total_bytes == 0:
+            return 100
+        return float(Fraction(self.get_used_bytes() * 100, self.total_bytes))
+
+    def get_additional_space_needed_exact(self):
+        """The exact space needed in bytes as a Fraction (may be negative), or None."""
+        if self.target is None or self.total_bytes == 0 or self.target >= 100:
+            return None
+        # (T*P - F) / (1 - P) with P = target / 100
+        return (self.total_bytes * self.target - 100 * self.free_bytes) / (100 - self.target)
+
+    def get_additional_space_needed_bytes(self, granularity=None):
+        """Bytes to add, rounded up to a whole number of `granularity` units (default: the model's)."""
+        exact = self.get_additional_space_needed_exact()
+        if exact is None:
+            return None
+        if exact <= 0:
+            return 0
+        g = self.granularity if granularity is None else granularity_bytes(granularity)
+        return _ceil_div(exact.numerator, exact.denominator * g) * g
+
+    def get_additional_space_needed_gb(self):
+        """Whole GB to add, like DiskSpaceModel (always GB granularity)."""
+        needed = self.get_additional_space_needed_bytes(BYTES_PER_GB)
+        return None if needed is None else needed // BYTES_PER_GB
+
+##################################################
+# Fleet (int64)
+##################################################
+def _scaled_target(target):
+    if target is None or (isinstance(target, float) and math.isnan(target)):
+        return NO_RESULT
+    scaled = exact_percentage(target) * TARGET_SCALE
+    if scaled.denominator != 1:
+        scaled = round(scaled)  # finer than a millionth of a percent
+    return int(scaled) if scaled < 100 * TARGET_SCALE else NO_RESULT
+
+class ExactFleet:
+    """Integer-byte calculations for many volumes on int64 columns.
+
+    `granularity` is a unit name, a byte count, or one byte count per volume
+    (e.g. each volume's allocation unit). NO_RESULT (-1) in the additional
+    space column marks a volume with no target, zero total, or a target of
+    100% or more. Answers must fit in int64 bytes (8 EiB).
+    """
+
+    def __init__(self, total_bytes, free_bytes, target_free_percentage=None, granularity=DEFAULT_GRANULARITY):
+        count = len(total_bytes)
+        if len(free_bytes) != count:
+            raise ValueError("Total and free space columns must be the same length.")
+        if target_free_percentage is None or isinstance(target_free_percentage, (int, float, str, Fraction)):
+            targets = array('q', [_scaled_target(target_free_percentage)]) * count
+        else:
+            if len(target_free_percentage) != count:
+                raise ValueError("Target percentage column must match the number of volumes.")
+            targets = array('q', (_scaled_target(t) for t in target_free_percentage))
+        if isinstance(granularity, (str, int)):
+            granularity = array('q', [granularity_bytes(granularity)]) * count
+        else:
+            granularity = array('q', (granularity_bytes(g) for g in granularity))
+
+        np = load_numpy()
+        if np is not None:
+            self.total_bytes = np.asarray(total_bytes, dtype=np.int64)
+            self.free_bytes = np.asarray(free_bytes, dtype=np.int64)
+            self.targets = np.asarray(targets, dtype=np.int64)
+            self.granularity = np.asarray(granularity, dtype=np.int64)
+        else:
+            self.total_bytes = array('q', total_bytes)
+            self.free_bytes = array('q', free_bytes)
+            self.targets = targets
+            self.granularity = granularity
+
+    def __len__(self):
+        return len(self.total_bytes)
+
+    @instrumented("exact.fleet.calculate")
+    def calculate(self):
+        """Returns free %, used % (float64) and additional bytes (int64) for every volume."""
+        if load_numpy() is not None:
+            return self._calculate_numpy()
+        return self._calculate_array()
+
+    # The additional space is n*U/D - F bytes, where U = T - F is used space,
+    # n the scaled target and D = 100*scale - n. Splitting U = Uh*D + Ul keeps
+    # the intermediate products inside int64 (n*Ul < n*D < 10**16) as long as
+    # the answer itself fits; larger answers raise OverflowError.
+    def _calculate_numpy(self):
+        np = load_numpy()
+        T = self.total_bytes
+        F = self.free_bytes
+        n = self.targets
+        g = self.granularity
+        valid = (T > 0) & (n >= 0)
+        n = np.where(valid, n, 0)
+        D = 100 * TARGET_SCALE - n
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            free_pct = np.where(T == 0, 0.0, F / np.where(T == 0, 1, T) * 100)
+        used_pct = 100 - free_pct
+
+        U = T - F
+        Uh, Ul = np.divmod(U, D)
+        if np.any(Uh > np.iinfo(np.int64).max // np.maximum(n, 1)):
+            raise OverflowError("Additional space needed does not fit in int64 bytes.")
+        Q, R = np.divmod(n * Ul, D)
+        B = n * Uh + Q - F
+        # ceil((B + R/D) / g) with 0 <= R/D < 1
+        units = np.where(R > 0, B // g + 1, -((-B) // g))
+        additional = np.where((B > 0) | ((B == 0) & (R > 0)), units * g, 0)
+        additional = np.where(valid, additional, NO_RESULT)
+        return ExactFleetResult(free_pct, used_pct, additional)
+
+    def _calculate_array(self):
+        count = len(self)
+        free_pct = array('d', bytes(8 * count))
+        used_pct = array('d', bytes(8 * count))
+        additional = array('q', bytes(8 * count))
+        full = 100 * TARGET_SCALE
+        for i, (T, F, n, g) in enumerate(zip(self.total_bytes, self.free_bytes, self.targets, self.granularity)):
+            free_pct[i] = 0.0 if T == 0 else F / T * 100
+            used_pct[i] = 100 - free_pct[i]
+            if T <= 0 or n < 0:
+                additional[i] = NO_RESULT
+                continue
+            # Python ints do not overflow, so the exact rational can be rounded directly
+            numerator = n * (T - F) - (full - n) * F
+            if numerator <= 0:
+                additional[i] = 0
+                continue
+            try:
+                additional[i] = _ceil_div(numerator, (full - n) * g) * g
+            except OverflowError:
+                raise OverflowError("Additional space needed does not fit in int64 bytes.") from None
+        return ExactFleetResult(free_pct, used_pct, additional)
@@ -0,0 +1,379 @@
+"""Memory-mapped, struct-of-arrays store for very large fleets.
+
+Instead of one DiskSpaceModel object per volume, total, free and target are
+kept in fixed-width float64 columns inside a single memory-mapped file,
+together with an open-addressing hash index on the (server, volume) key.
+Reopening a store only maps the file, so a multi-million-volume fleet is
+available in milliseconds, and the columns can be handed to FleetModel
+without copying.
+
+File layout (all sections 8-byte aligned, little-endian):
+    header | total f8[cap] | free f8[cap] | target f8[cap] | key_hash u8[cap]
+    | key_offset u8[cap] | key_length u4[cap] | slots i8[n_slots] | key bytes
+
+Usage:
+    python fleet_store.py import alerts.csv fleet.dsf
+    python fleet_store.py info fleet.dsf
+"""
+import argparse
+import csv
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+import weakref
+
+from batch_email import parse_number, parse_size, parse_text
+from disk_space_core import FleetModel
+
+MAGIC = b"DSFLEET1"
+HEADER = struct.Struct("<8sQQQQQ")  # magic, count, capacity, slot count, key bytes capacity, key bytes used
+HEADER_SIZE = 64
+DEFAULT_CAPACITY = 1024
+AVERAGE_KEY_BYTES = 32
+EMPTY_SLOT = -1
+# Default for update() fields that should be left as they are
+UNCHANGED = object()
+
+def _key_bytes(server, volume):
+    return f"{server}\x00{volume}".encode("utf-8")
+
+def _key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+def _align(n):
+    return (n + 7) & ~7
+
+def _layout(capacity, slot_count, key_capacity):
+    """Returns the byte offset of every section and the total file size."""
+    offsets = {}
+    position = HEADER_SIZE
+    for name, size in (
+        ("total", 8 * capacity),
+        ("free", 8 * capacity),
+        ("target", 8 * capacity),
+        ("key_hash", 8 * capacity),
+        ("key_offset", 8 * capacity),
+        ("key_length", 4 * capacity),
+        ("slots", 8 * slot_count),
+        ("keys", key_capacity),
+    ):
+        offsets[name] = position
+        position = _align(position + size)
+    return offsets, position
+
+def _slot_count_for(capacity):
+    # Keep the index at most half full so probe chains stay short
+    slots = 1
+    while slots < 2 * capacity:
+        slots *= 2
+    return slots
+
+class FleetStore:
+    """Persistent per-volume total/free/target columns with O(1) keyed access."""
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, create=True):
+        """Opens the store at `path`, creating it with room for `capacity` volumes if missing.
+
+        With `create` false a missing file raises FileNotFoundError instead.
+        """
+        self.path = path
+        # Live views over the mapping by id(); weak (writable memoryviews are not hashable, so
+        # no WeakSet) so views handed out by columns() are released on remap without piling up
+        self._views = weakref.WeakValueDictionary()
+        self._mm = None
+        if create and not os.path.exists(path):
+            self._create(path, capacity, capacity * AVERAGE_KEY_BYTES)
+        self._open()
+
+    @staticmethod
+    def _create(path, capacity, key_capacity, count=0):
+        slot_count = _slot_count_for(capacity)
+        offsets, size = _layout(capacity, slot_count, key_capacity)
+        with open(path, "wb") as f:
+            f.truncate(size)
+            f.write(HEADER.pack(MAGIC, count, capacity, slot_count, key_capacity, 0))
+            # Mark every index slot empty (-1 is all 0xff bytes)
+            f.seek(offsets["slots"])
+            f.write(b"\xff" * (8 * slot_count))
+
+    def _open(self):
+        self._file = open(self.path, "r+b")
+        header = self._file.read(HEADER_SIZE)
+        # Check the header and file size before mapping, so a short or foreign file is not half-opened
+        if len(header) < HEADER_SIZE or not self._read_header(header):
+            self._file.close()
+            raise ValueError(f"{self.path} is not a fleet store file.")
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self._map_columns()
+
+    def _read_header(self, header):
+        """Sets the header fields; returns False if they do not describe this file."""
+        magic, self.count, self.capacity, self.slot_count, self.key_capacity, self.key_used = \
+            HEADER.unpack_from(header, 0)
+        if magic != MAGIC or self.count > self.capacity or self.key_used > self.key_capacity:
+            return False
+        if self.slot_count < 2 * self.capacity or self.slot_count & (self.slot_count - 1):
+            return False
+        _, size = _layout(self.capacity, self.slot_count, self.key_capacity)
+        return os.fstat(self._file.fileno()).st_size >= size
+
+    def _map_columns(self):
+        offsets, _ = _layout(self.capacity, self.slot_count, self.key_capacity)
+        self._keys_offset = offsets["keys"]
+        self.total_space_gb = self._view(offsets["total"], self.capacity, "d")
+        self.current_free_space_gb = self._view(offsets["free"], self.capacity, "d")
+        self.target_free_percentage = self._view(offsets["target"], self.capacity, "d")
+        self._key_hash = self._view(offsets["key_hash"], self.capacity, "Q")
+        self._key_offset = self._view(offsets["key_offset"], self.capacity, "Q")
+        self._key_length = self._view(offsets["key_length"], self.capacity, "I")
+        self._slots = self._view(offsets["slots"], self.slot_count, "q")
+
+    def _view(self, offset, length, fmt):
+        size = struct.calcsize(fmt)
+        view = memoryview(self._mm)[offset:offset + length * size].cast(fmt)
+        self._views[id(view)] = view
+        return view
+
+    def _write_header(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, self.count, self.capacity, self.slot_count,
+                         self.key_capacity, self.key_used)
+
+    def _release(self):
+        """Unmaps the file.
+
+        Raises BufferError, leaving the store open and usable, while something
+        else (such as the NumPy arrays of a to_fleet() FleetModel) still holds
+        a buffer on the mapped columns.
+        """
+        views, self._views = list(self._views.values()), weakref.WeakValueDictionary()
+        in_use = []
+        for view in views:
+            try:
+                view.release()
+            except BufferError:
+                in_use.append(view)
+        if not in_use and self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                in_use.append(self._mm)
+        if in_use:
+            # The mapping is still open, so give the store fresh views over it
+            self._views.update((id(view), view) for view in in_use if view is not self._mm)
+            self._map_columns()
+            raise BufferError("The fleet store's columns are still in use (e.g. by a FleetModel from "
+                              "to_fleet()); delete those references before closing or growing the store.")
+        self._mm = None
+        self._file.close()
+
+    def _grow(self, capacity, key_capacity):
+        """Rewrites the store with larger columns; amortized O(1) per insert."""
+        tmp_path = self.path + ".tmp"
+        self._create(tmp_path, capacity, key_capacity, self.count)
+        new = FleetStore.__new__(FleetStore)
+        new.path = tmp_path
+        new._views = weakref.WeakValueDictionary()
+        new._mm = None
+        new._open()
+
+        n = self.count
+        new.total_space_gb[:n] = self.total_space_gb[:n]
+        new.current_free_space_gb[:n] = self.current_free_space_gb[:n]
+        new.target_free_percentage[:n] = self.target_free_percentage[:n]
+        new._key_hash[:n] = self._key_hash[:n]
+        new._key_offset[:n] = self._key_offset[:n]
+        new._key_length[:n] = self._key_length[:n]
+        start = self._keys_offset
+        new._mm[new._keys_offset:new._keys_offset + self.key_used] = self._mm[start:start + self.key_used]
+        new.key_used = self.key_used
+
+        # Re-place every record in the larger index using its stored hash
+        mask = new.slot_count - 1
+        slots = new._slots
+        for index, h in enumerate(new._key_hash[:n]):
+            slot = h & mask
+            while slots[slot] != EMPTY_SLOT:
+                slot = (slot + 1) & mask
+            slots[slot] = index
+        new._write_header()
+        new._mm.flush()
+        new._release()
+
+        try:
+            self._release()
+        except BufferError:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def flush(self):
+        """Writes pending changes to disk."""
+        self._write_header()
+        self._mm.flush()
+
+    def close(self):
+        if self._mm is not None:
+            self.flush()
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _find(self, key, h):
+        """Returns (record index or None, slot where the key is or would go)."""
+        mask = self.slot_count - 1
+        slot = h & mask
+        slots = self._slots
+        while True:
+            index = slots[slot]
+            if index == EMPTY_SLOT:
+                return None, slot
+            if self._key_hash[index] == h and self._key_at(index) == key:
+                return index, slot
+            slot = (slot + 1) & mask
+
+    def _key_at(self, index):
+        start = self._keys_offset + self._key_offset[index]
+        return self._mm[start:start + self._key_length[index]]
+
+    def index_of(self, server, volume):
+        """Returns the column index of a volume, or None if it is not stored."""
+        key = _key_bytes(server, volume)
+        index, _ = self._find(key, _key_hash(key))
+        return index
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return self.index_of(*key) is not None
+
+    def get(self, server, volume):
+        """Returns (total_gb, free_gb, target % or None) for a volume, or None."""
+        index = self.index_of(server, volume)
+        if index is None:
+            return None
+        target = self.target_free_percentage[index]
+        return (self.total_space_gb[index], self.current_free_space_gb[index],
+                None if math.isnan(target) else target)
+
+    def put(self, server, volume, total_space_gb, free_space_gb, target_free_percentage=None):
+        """Inserts a volume or updates it in place; returns its column index."""
+        key = _key_bytes(server, volume)
+        h = _key_hash(key)
+        index, slot = self._find(key, h)
+        if index is None:
+            if self.count >= self.capacity or self.key_used + len(key) > self.key_capacity:
+                self._grow(max(self.capacity * 2, 1), max(self.key_capacity * 2, self.key_used + len(key)))
+                _, slot = self._find(key, h)
+            index = self.count
+            start = self._keys_offset + self.key_used
+            self._mm[start:start + len(key)] = key
+            self._key_hash[index] = h
+            self._key_offset[index] = self.key_used
+            self._key_length[index] = len(key)
+            self._slots[slot] = index
+            self.key_used += len(key)
+            self.count += 1
+        self.update(index, total_space_gb, free_space_gb, target_free_percentage)
+        return index
+
+    def update(self, index, total_space_gb=UNCHANGED, free_space_gb=UNCHANGED, target_free_percentage=UNCHANGED):
+        """Overwrites the fields passed for the volume at `index` in place.
+
+        Fields left out keep their stored value; a target of None clears the target.
+        """
+        if not 0 <= index < self.count:
+            raise IndexError("Volume index out of range.")
+        if total_space_gb is not UNCHANGED:
+            self.total_space_gb[index] = total_space_gb
+        if free_space_gb is not UNCHANGED:
+            self.current_free_space_gb[index] = free_space_gb
+        if target_free_percentage is not UNCHANGED:
+            self.target_free_percentage[index] = math.nan if target_free_percentage is None else target_free_percentage
+
+    def keys(self):
+        """Yields (server, volume) for every stored volume in column order."""
+        for index in range(self.count):
+            server, volume = bytes(self._key_at(index)).decode("utf-8").split("\x00", 1)
+            yield server, volume
+
+    def columns(self):
+        """Returns zero-copy (total, free, target) memoryviews over the stored volumes."""
+        n = self.count
+        views = self.total_space_gb[:n], self.current_free_space_gb[:n], self.target_free_percentage[:n]
+        # Tracked so they are released (not left dangling) if the file is remapped
+        self._views.update((id(view), view) for view in views)
+        return views
+
+    def to_fleet(self):
+        """Builds a FleetModel over the mapped columns (no copy when NumPy is installed).
+
+        With NumPy the fleet's arrays share the mapped file, so while it is
+        alive close() and a put() that has to grow the store raise BufferError
+        (the store stays open); drop the fleet first.
+        """
+        return FleetModel(*self.columns())
+
+##################################################
+# Command Line
+##################################################
+def import_csv(store, stream, unit="GB"):
+    """Loads server, volume, total, free, target rows into the store; returns the row count.
+
+    Rows without a key, with bad sizes, or with a target that is not a
+    percentage below 100 are skipped.
+    """
+    count = 0
+    for row in csv.DictReader(stream):
+        server = parse_text(row.get("server"))
+        volume = parse_text(row.get("volume"))
+        try:
+            total = parse_size(row.get("total"), unit)
+            free = parse_size(row.get("free"), unit)
+            target = parse_number(row.get("target"))
+        except ValueError:
+            continue
+        if not server or not volume or total is None or free is None or free > total:
+            continue
+        if target is not None and not 0 <= target < 100.0:
+            continue
+        store.put(server, volume, total, free, target)
+        count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage a memory-mapped fleet store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Load a CSV of volumes into a store")
+    import_parser.add_argument("csv")
+    import_parser.add_argument("store")
+    import_parser.add_argument("--unit", default="GB", help="Unit of sizes without a suffix")
+    info_parser = commands.add_parser("info", help="Summarize a store")
+    info_parser.add_argument("store")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        with open(args.csv, newline="", encoding="utf-8") as f, FleetStore(args.store) as store:
+            count = import_csv(store, f, args.unit)
+            print(f"Imported {count} rows; store holds {len(store)} volumes")
+    else:
+        try:
+            store = FleetStore(args.store, create=False)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        with store:
+            total, free, _ = store.columns()
+            print(f"{len(store)} volumes (capacity {store.capacity}), "
+                  f"{sum(total):.2f} GB total, {sum(free):.2f} GB free")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+"""Virtualized multi-volume table for the Disk Space Calculator GUI.
+
+FleetTable holds the per-volume keys and FleetModel results and works out
+filtered and sorted row orders. It does not touch Tk, so loading, sorting and
+filtering run on a worker thread and the results are handed back to the Tk
+main thread through a queue.
+
+FleetView shows a FleetTable in a ttk.Treeview that only ever holds one
+screenful of items. Scrolling rewrites the values of those items instead of
+inserting one item per volume, so 100k volumes scroll as fast as 100.
+"""
+import copy
+import math
+import queue
+import threading
+import tkinter as tk
+from array import array
+from tkinter import ttk, filedialog, messagebox
+
+from batch_email import parse_number, parse_size, parse_text, read_rows
+from disk_space_core import FleetModel, load_numpy
+
+# (column id, heading, width, numeric)
+COLUMNS = [
+    ("server", "Server", 140, False),
+    ("volume", "Volume", 80, False),
+    ("client", "Client", 70, False),
+    ("total", "Total (GB)", 90, True),
+    ("free_pct", "Free %", 70, True),
+    ("used_pct", "Used %", 70, True),
+    ("additional", "Space To Add (GB)", 120, True),
+]
+NUMERIC_COLUMNS = {column for column, _, _, numeric in COLUMNS if numeric}
+DEFAULT_TARGET = 15.0
+POLL_MS = 25
+FILTER_DELAY_MS = 250
+DEFAULT_ROW_HEIGHT = 20
+
+##################################################
+# Table Data
+##################################################
+class FleetTable:
+    """Keys, inputs and calculated columns for a fleet, in load order."""
+
+    def __init__(self, servers, volumes, clients, total_space_gb, free_space_gb, own_targets, default_target=None):
+        self.servers = servers
+        self.volumes = volumes
+        self.clients = clients
+        self.total_space_gb = array('d', total_space_gb)
+        self.current_free_space_gb = array('d', free_space_gb)
+        # NaN where a row has no target of its own and default_target applies
+        self.own_targets = array('d', own_targets)
+        self.skipped = 0
+        self._search_text = None
+        self.set_default_target(default_target)
+
+    @classmethod
+    def from_rows(cls, rows, unit="GB", default_target=None):
+        """Builds a table from server, volume, client, total, free[, target] rows; bad rows are skipped."""
+        servers, volumes, clients, totals, frees, targets = [], [], [], [], [], []
+        skipped = 0
+        for row in rows:
+            try:
+                total = parse_size(row.get("total"), unit)
+                free = parse_size(row.get("free"), unit)
+                target = parse_number(row.get("target"))
+            except ValueError:
+                skipped += 1
+                continue
+            if total is None or free is None or free > total or (target is not None and not 0 <= target < 100.0):
+                skipped += 1
+                continue
+            servers.append(parse_text(row.get("server")))
+            volumes.append(parse_text(row.get("volume")))
+            clients.append(parse_text(row.get("client")))
+            totals.append(total)
+            frees.append(free)
+            targets.append(math.nan if target is None else target)
+        table = cls(servers, volumes, clients, totals, frees, targets, default_target)
+        table.skipped = skipped
+        return table
+
+    @classmethod
+    def from_store(cls, store, default_target=None):
+        """Copies the volumes of an open FleetStore into a table."""
+        servers, volumes = [], []
+        for server, volume in store.keys():
+            servers.append(server)
+            volumes.append(volume)
+        total, free, target = store.columns()
+        return cls(servers, volumes, [""] * len(servers), total, free, target, default_target)
+
+    def __len__(self):
+        return len(self.total_space_gb)
+
+    def set_default_target(self, default_target):
+        """Recalculates every row, using `default_target` for rows without their own target."""
+        self.default_target = default_target
+        fill = math.nan if default_target is None else default_target
+        targets = array('d', (fill if math.isnan(t) else t for t in self.own_targets))
+        result = FleetModel(self.total_space_gb, self.current_free_space_gb, targets).calculate()
+        self.targets, self.result = targets, result
+
+    def with_default_target(self, default_target):
+        """Returns a recalculated copy sharing the input columns; this table is left untouched.
+
+        Lets a worker thread recalculate while the Tk thread keeps reading the current table.
+        """
+        table = copy.copy(self)
+        table.set_default_target(default_target)
+        return table
+
+    def column(self, column):
+        if column == "server":
+            return self.servers
+        elif column == "volume":
+            return self.volumes
+        elif column == "client":
+            return self.clients
+        elif column == "total":
+            return self.total_space_gb
+        elif column == "free_pct":
+            return self.result.free_percentage
+        elif column == "used_pct":
+            return self.result.used_percentage
+        elif column == "additional":
+            return self.result.additional_space_needed_gb
+        raise ValueError(f"Unknown column: {column}")
+
+    def _matches(self, text):
+        if self._search_text is None:
+            self._search_text = [f"{s}\x00{v}\x00{c}".lower() for s, v, c in zip(self.servers, self.volumes, self.clients)]
+        return [i for i, searchable in enumerate(self._search_text) if text in searchable]
+
+    def order(self, sort_column=None, descending=False, text="", needs_space=False):
+        """Returns the indices of the rows passing the filter, sorted by `sort_column`.
+
+        `text` matches server, volume or client case-insensitively. Rows without
+        a result (NaN) sort after every number in both directions.
+        """
+        text = text.strip().lower()
+        indices = self._matches(text) if text else range(len(self))
+        if needs_space:
+            additional = self.result.additional_space_needed_gb
+            indices = [i for i in indices if additional[i] > 0]
+        if sort_column is None:
+            return list(indices)
+
+        values = self.column(sort_column)
+        np = load_numpy()
+        if sort_column in NUMERIC_COLUMNS and np is not None:
+            indices = np.asarray(indices, dtype=np.intp)
+            keys = np.asarray(values, dtype=np.float64)[indices]
+            if descending:
+                keys = -keys
+            keys = np.where(np.isnan(keys), np.inf, keys)
+            return indices[np.argsort(keys, kind="stable")].tolist()
+        if sort_column in NUMERIC_COLUMNS:
+            missing = math.inf if not descending else -math.inf
+            key = lambda i: missing if math.isnan(values[i]) else values[i]
+        else:
+            key = lambda i: values[i].lower()
+        return sorted(indices, key=key, reverse=descending)
+
+    def row_values(self, index):
+        """Display strings for one row."""
+        additional = self.result.additional_space_needed_gb[index]
+        return (
+            self.servers[index],
+            self.volumes[index],
+            self.clients[index],
+            f"{self.total_space_gb[index]:.2f}",
+            f"{self.result.free_percentage[index]:.2f}",
+            f"{self.result.used_percentage[index]:.2f}",
+            "" if math.isnan(additional) else str(int(additional)),
+        )
+
+    def row(self, index):
+        """The inputs of one row as a dict for the single-volume calculator."""
+        target = self.targets[index]
+        return {
+            "server": self.servers[index],
+            "volume": self.volumes[index],
+            "client": self.clients[index],
+            "total_space_gb": self.total_space_gb[index],
+            "free_space_gb": self.current_free_space_gb[index],
+            "target_free_percentage": None if math.isnan(target) else target,
+        }
+
+def load_table(path, unit="GB", default_target=None):
+    """Loads a CSV, JSONL or fleet store (.dsf) file into a FleetTable."""
+    if path.endswith(".dsf"):
+        from fleet_store import FleetStore
+        with FleetStore(path, create=False) as store:
+            return FleetTable.from_store(store, default_target)
+    fmt = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+    with open(path, newline="", encoding="utf-8") as f:
+        return FleetTable.from_rows(read_rows(f, fmt), unit, default_target)
+
+##################################################
+# Tk View
+##################################################
+class FleetView:
+    """Toplevel window with a virtualized, sortable and filterable fleet table."""
+
+    def __init__(self, root, on_select, default_target=None):
+        self.root = root
+        self.on_select = on_select
+        self.table = None
+        self.order = []
+        self.offset = 0
+        self.page_size = 0
+        self.selected = None
+        self.sort_column = None
+        self.descending = False
+        self.loading = False
+
+        # Background work: only the result of the latest request is applied
+        self._results = queue.Queue()
+        self._generation = 0
+        self._polling = False
+        self._filter_pending = None
+
+        self.top = tk.Toplevel(root)
+        self.top.title("Fleet View")
+        self.top.geometry("820x520")
+
+        frame = ttk.Frame(self.top, padding="10")
+        frame.pack(expand=True, fill="both")
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        toolbar = ttk.Frame(frame)
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
+        toolbar.columnconfigure(2, weight=1)
+        ttk.Button(toolbar, text="Open...", command=self.open_file).grid(row=0, column=0, padx=5)
+        ttk.Label(toolbar, text="Filter:").grid(row=0, column=1, padx=5, sticky="e")
+        self.filter_var = tk.StringVar()
+        ttk.Entry(toolbar, textvariable=self.filter_var).grid(row=0, column=2, padx=5, sticky="ew")
+        self.needs_space_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="Needs space only", variable=self.needs_space_var,
+                        command=self.refresh_order).grid(row=0, column=3, padx=5)
+        ttk.Label(toolbar, text="Default Target %:").grid(row=0, column=4, padx=5, sticky="e")
+        self.target_var = tk.StringVar(value=f"{DEFAULT_TARGET if default_target is None else default_target:g}")
+        ttk.Entry(toolbar, textvariable=self.target_var, width=6).grid(row=0, column=5, padx=5)
+        ttk.Button(toolbar, text="Apply", command=self.apply_target).grid(row=0, column=6, padx=5)
+
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in COLUMNS], show="headings", selectmode="browse")
+        for column, heading, width, numeric in COLUMNS:
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=width, anchor="e" if numeric else "w")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.on_scroll)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+
+        self.status_var = tk.StringVar(value="Open a CSV, JSONL or fleet store file.")
+        ttk.Label(frame, textvariable=self.status_var).grid(row=2, column=0, columnspan=2, sticky="w", pady=(10, 0))
+
+        style_height = ttk.Style(self.top).lookup("Treeview", "rowheight")
+        self.row_height = int(style_height) if str(style_height).isdigit() else DEFAULT_ROW_HEIGHT
+
+        self.filter_var.trace_add('write', lambda *args: self.schedule_filter())
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-self.page_size))
+        self.tree.bind("<Next>", lambda e: self.move_selection(self.page_size))
+        self.tree.bind("<Home>", lambda e: self.move_selection(-len(self.order)))
+        self.tree.bind("<End>", lambda e: self.move_selection(len(self.order)))
+
+    def exists(self):
+        return bool(self.top.winfo_exists())
+
+    def lift(self):
+        self.top.deiconify()
+        self.top.lift()
+
+    # Background work
+    def run_in_background(self, func, args, on_done, status):
+        """Runs func(*args) on a worker thread and calls on_done(result) on the Tk thread."""
+        self._generation += 1
+        generation = self._generation
+        self.status_var.set(status)
+
+        def work():
+            try:
+                self._results.put((generation, on_done, func(*args), None))
+            except Exception as e:
+                self._results.put((generation, on_done, None, e))
+        threading.Thread(target=work, daemon=True).start()
+        if not self._polling:
+            self._polling = True
+            self.top.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        if not self.exists():
+            return
+        while True:
+            try:
+                generation, on_done, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation:
+                continue  # superseded by a newer request
+            self._polling = False
+            if error is not None:
+                self.loading = False
+                self.status_var.set(f"Error: {error}")
+            else:
+                on_done(result)
+            return
+        self.top.after(POLL_MS, self._poll)
+
+    # Loading
+    def open_file(self):
+        path = filedialog.askopenfilename(parent=self.top, filetypes=[
+            ("Fleet files", "*.csv *.jsonl *.ndjson *.dsf"), ("All files", "*.*")])
+        if path:
+            self.load(path)
+
+    def default_target(self):
+        text = self.target_var.get().strip()
+        if not text:
+            return None
+        try:
+            target = float(text)
+        except ValueError:
+            target = -1.0
+        if not 0 <= target < 100.0:
+            messagebox.showerror("Input Error", "Default target must be a percentage below 100.", parent=self.top)
+            raise ValueError(text)
+        return target
+
+    def load(self, path):
+        try:
+            default_target = self.default_target()
+        except ValueError:
+            return
+        self.loading = True
+        self.run_in_background(load_table, (path, "GB", default_target), self._set_table, f"Loading {path}...")
+
+    def _set_table(self, table):
+        self.loading = False
+        self.table = table
+        self.selected = None
+        self.order = []
+        self.refresh_order()
+
+    def apply_target(self):
+        if self.table is None or self.loading:
+            return
+        try:
+            default_target = self.default_target()
+        except ValueError:
+            return
+        self.loading = True
+        # The new table is swapped in on the Tk thread by _set_table
+        self.run_in_background(self.table.with_default_target, (default_target,), self._set_table, "Recalculating...")
+
+    # Sorting and filtering
+    def sort_by(self, column):
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = column in NUMERIC_COLUMNS  # largest first is the useful default
+        for name, heading, _, _ in COLUMNS:
+            arrow = (" ▼" if self.descending else " ▲") if name == column else ""
+            self.tree.heading(name, text=heading + arrow)
+        self.refresh_order()
+
+    def schedule_filter(self):
+        if self._filter_pending is not None:
+            self.top.after_cancel(self._filter_pending)
+        self._filter_pending = self.top.after(FILTER_DELAY_MS, self.refresh_order)
+
+    def refresh_order(self):
+        self._filter_pending = None
+        if self.table is None or self.loading:
+            return  # applied once loading finishes
+        args = (self.sort_column, self.descending, self.filter_var.get(), self.needs_space_var.get())
+        self.run_in_background(self.table.order, args, self._set_order, "Sorting...")
+
+    def _set_order(self, order):
+        self.order = order
+        self.offset = 0
+        self.render()
+        status = f"{len(order):,} of {len(self.table):,} volumes"
+        if self.table.skipped:
+            status += f" ({self.table.skipped:,} invalid rows skipped)"
+        self.status_var.set(status)
+
+    # Virtual rendering
+    def on_resize(self, event):
+        # The heading takes about one row
+        page_size = max(1, event.height // self.row_height - 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render()
+
+    def render(self):
+        """Shows rows offset..offset+page_size of the current order in the fixed set of items."""
+        count = len(self.order)
+        self.offset = max(0, min(self.offset, count - self.page_size))
+        visible = min(self.page_size, count)
+        items = self.tree.get_children()
+        if len(items) > visible:
+            self.tree.delete(*items[visible:])
+            items = items[:visible]
+        elif len(items) < visible:
+            items = items + tuple(self.tree.insert("", tk.END) for _ in range(visible - len(items)))
+
+        selected_item = None
+        for position, item in enumerate(items):
+            index = self.order[self.offset + position]
+            self.tree.item(item, values=self.table.row_values(index))
+            if index == self.selected:
+                selected_item = item
+        if selected_item is not None:
+            self.tree.selection_set(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        if count:
+            self.scrollbar.set(self.offset / count, (self.offset + visible) / count)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_scroll(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.order))
+            self.render()
+        elif args[0] == "scroll":
+            step = self.page_size if args[2] == "pages" else 1
+            self.scroll_rows(int(args[1]) * step)
+
+    def scroll_rows(self, rows):
+        self.offset += rows
+        self.render()
+        return "break"
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small deltas
+        notches = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_rows(-3 * notches)
+
+    # Selection
+    def move_selection(self, rows):
+        if not self.order:
+            return "break"
+        try:
+            position = self.order.index(self.selected) + rows
+        except ValueError:
+            position = self.offset if rows > 0 else self.offset + self.page_size - 1
+        position = max(0, min(position, len(self.order) - 1))
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.page_size:
+            self.offset = position - self.page_size + 1
+        self.select(self.order[position])
+        return "break"
+
+    def on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        position = self.tree.index(selection[0])
+        if self.offset + position < len(self.order):
+            index = self.order[self.offset + position]
+            if index != self.selected:  # also filters the event from render's selection_set
+                self.select(index)
+
+    def select(self, index):
+        self.selected = index
+        self.render()
+        self.on_select(self.table.row(index))
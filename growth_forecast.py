@@ -0,0 +1,185 @@
+"""Growth forecasting for volumes tracked over time.
+
+Each volume keeps its last N (timestamp, free_gb) samples in a fixed-size
+ring buffer of array('d') columns, together with running least-squares sums.
+Adding a sample is O(1) (the evicted sample is subtracted from the sums), so
+fill rates and time-to-threshold can be queried for many volumes without
+rescanning their history.
+"""
+from array import array
+
+from disk_space_core import DiskSpaceModel
+
+SECONDS_PER_DAY = 86400.0
+DEFAULT_CAPACITY = 256
+
+##################################################
+# Per-Volume History
+##################################################
+class VolumeHistory:
+    """Ring buffer of free-space samples with a streaming linear fit."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 2:
+            raise ValueError("History capacity must be at least 2 samples.")
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.free_gb = array('d', bytes(8 * capacity))
+        self.count = 0
+        self.next_index = 0
+        # Times are stored in days relative to the first sample to keep the sums well conditioned
+        self.origin = None
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self.sum_t = 0.0
+        self.sum_f = 0.0
+        self.sum_tt = 0.0
+        self.sum_tf = 0.0
+
+    def _recompute_sums(self):
+        # Re-summing once per wrap of the buffer removes drift from repeated subtraction
+        self._reset_sums()
+        for i in range(self.count):
+            t, f = self.timestamps[i], self.free_gb[i]
+            self.sum_t += t
+            self.sum_f += f
+            self.sum_tt += t * t
+            self.sum_tf += t * f
+
+    def add_sample(self, timestamp, free_gb):
+        """Records free space (GB) observed at `timestamp` (seconds since the epoch)."""
+        if self.origin is None:
+            self.origin = timestamp
+        t = (timestamp - self.origin) / SECONDS_PER_DAY
+
+        i = self.next_index
+        if self.count == self.capacity:
+            old_t, old_f = self.timestamps[i], self.free_gb[i]
+            self.sum_t -= old_t
+            self.sum_f -= old_f
+            self.sum_tt -= old_t * old_t
+            self.sum_tf -= old_t * old_f
+        else:
+            self.count += 1
+
+        self.timestamps[i] = t
+        self.free_gb[i] = free_gb
+        self.sum_t += t
+        self.sum_f += free_gb
+        self.sum_tt += t * t
+        self.sum_tf += t * free_gb
+
+        self.next_index = (i + 1) % self.capacity
+        if self.next_index == 0 and self.count == self.capacity:
+            self._recompute_sums()
+
+    def __len__(self):
+        return self.count
+
+    def latest(self):
+        """Returns the most recent (timestamp, free_gb) sample, or None."""
+        if self.count == 0:
+            return None
+        i = (self.next_index - 1) % self.capacity
+        return self.origin + self.timestamps[i] * SECONDS_PER_DAY, self.free_gb[i]
+
+    def fill_rate_gb_per_day(self):
+        """GB of free space consumed per day (negative when space is being freed).
+
+        Returns None until there are two samples at distinct times.
+        """
+        n = self.count
+        if n < 2:
+            return None
+        denominator = n * self.sum_tt - self.sum_t * self.sum_t
+        if denominator <= 0:
+            return None
+        slope = (n * self.sum_tf - self.sum_t * self.sum_f) / denominator
+        return -slope
+
+    def projected_free_gb(self, days_ahead):
+        """Free space expected `days_ahead` days after the latest sample."""
+        latest = self.latest()
+        rate = self.fill_rate_gb_per_day()
+        if latest is None or rate is None:
+            return None
+        return latest[1] - rate * days_ahead
+
+    def days_to_threshold(self, total_space_gb, target_free_percentage):
+        """Days after the latest sample until free space drops to the target %.
+
+        Returns 0 if the volume is already below target, or None if it is not filling.
+        """
+        latest = self.latest()
+        rate = self.fill_rate_gb_per_day()
+        if latest is None or rate is None:
+            return None
+        threshold_gb = total_space_gb * target_free_percentage / 100.0
+        if latest[1] <= threshold_gb:
+            return 0.0
+        if rate <= 0:
+            return None
+        return (latest[1] - threshold_gb) / rate
+
+    def space_needed_for_horizon(self, total_space_gb, target_free_percentage, horizon_days):
+        """GB to add now so the volume still meets its target after `horizon_days`."""
+        projected_free = self.projected_free_gb(horizon_days)
+        if projected_free is None:
+            return None
+        model = DiskSpaceModel()
+        model.set_total_space_gb(total_space_gb)
+        model.set_free_space_gb(projected_free)
+        model.target_free_percentage = target_free_percentage
+        return model.get_additional_space_needed_gb()
+
+##################################################
+# Fleet History Store
+##################################################
+class HistoryStore:
+    """Keeps a VolumeHistory per (server, volume) key."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.volumes = {}
+
+    def add_sample(self, key, timestamp, free_gb):
+        history = self.volumes.get(key)
+        if history is None:
+            history = self.volumes[key] = VolumeHistory(self.capacity)
+        history.add_sample(timestamp, free_gb)
+
+    def get(self, key):
+        return self.volumes.get(key)
+
+    def __len__(self):
+        return len(self.volumes)
+
+    def forecast(self, totals_gb, target_free_percentage, horizon_days):
+        """Yields (key, fill rate, days to threshold, GB needed for horizon) per volume.
+
+        `totals_gb` maps each key to its total size; keys without a total are skipped.
+        """
+        for key, history in self.volumes.items():
+            total_gb = totals_gb.get(key)
+            if total_gb is None:
+                continue
+            yield (
+                key,
+                history.fill_rate_gb_per_day(),
+                history.days_to_threshold(total_gb, target_free_percentage),
+                history.space_needed_for_horizon(total_gb, target_free_percentage, horizon_days),
+            )
+
+    def volumes_due_within(self, totals_gb, target_free_percentage, days):
+        """Returns keys expected to reach the target within `days`, soonest first."""
+        due = []
+        for key, history in self.volumes.items():
+            total_gb = totals_gb.get(key)
+            if total_gb is None:
+                continue
+            remaining = history.days_to_threshold(total_gb, target_free_percentage)
+            if remaining is not None and remaining <= days:
+                due.append((remaining, key))
+        due.sort()
+        return [key for _, key in due]
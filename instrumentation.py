@@ -0,0 +1,147 @@
+"""Opt-in hot-path instrumentation and profiling hooks.
+
+Functions decorated with @instrumented("name") record call counts and a
+latency histogram. Instrumentation is decided when a module is imported:
+unless DSC_INSTRUMENT=1 is set, the decorator returns the function unchanged,
+so disabled instrumentation costs nothing per call.
+
+Environment switches:
+    DSC_INSTRUMENT=1          record call counts and latency histograms
+    DSC_METRICS=path          write metrics at exit (.prom for Prometheus text, else JSON)
+    DSC_PROFILE=path          run cProfile for the whole session and dump stats at exit
+"""
+import atexit
+import os
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in seconds (Prometheus style, +Inf is implied)
+BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+ENABLED = os.environ.get("DSC_INSTRUMENT", "").strip().lower() in ("1", "true", "yes", "on")
+
+class Histogram:
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+_metrics = {}
+
+class _NoLock:
+    # Stands in until instrumentation is first used, so importing this module
+    # (and everything that imports it) does not pay for threading
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_lock = _NoLock()
+
+def _record(name, seconds):
+    with _lock:
+        histogram = _metrics.get(name)
+        if histogram is None:
+            histogram = _metrics[name] = Histogram()
+        histogram.observe(seconds)
+
+def instrumented(name):
+    """Decorator recording calls to the function under `name` when instrumentation is enabled."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        global _lock
+        import functools
+        import threading
+        if isinstance(_lock, _NoLock):
+            _lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def reset():
+    """Discards all recorded metrics."""
+    with _lock:
+        _metrics.clear()
+
+def snapshot():
+    """Returns the recorded metrics as a JSON-serializable dict."""
+    with _lock:
+        items = sorted(_metrics.items())
+        result = {}
+        for name, histogram in items:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(BUCKETS + (float("inf"),), histogram.buckets):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else f"{bound:g}"] = cumulative
+            result[name] = {
+                "count": histogram.count,
+                "sum_seconds": histogram.total,
+                "mean_seconds": histogram.total / histogram.count if histogram.count else 0.0,
+                "buckets": buckets,
+            }
+    return result
+
+def to_json(indent=2):
+    import json
+    return json.dumps(snapshot(), indent=indent)
+
+def to_prometheus(metric="dsc_call_duration_seconds"):
+    """Renders the metrics in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {metric} Latency of instrumented Disk Space Calculator calls.",
+        f"# TYPE {metric} histogram",
+    ]
+    for name, data in snapshot().items():
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        for bound, count in data["buckets"].items():
+            lines.append(f'{metric}_bucket{{name="{label}",le="{bound}"}} {count}')
+        lines.append(f'{metric}_sum{{name="{label}"}} {data["sum_seconds"]!r}')
+        lines.append(f'{metric}_count{{name="{label}"}} {data["count"]}')
+    return "\n".join(lines) + "\n"
+
+def write_metrics(path):
+    """Writes metrics to `path`: Prometheus text for .prom files, JSON otherwise."""
+    text = to_prometheus() if path.endswith(".prom") else to_json()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+##################################################
+# Session Switches
+##################################################
+def start_profiling(path):
+    """Profiles the rest of this session with cProfile and dumps the stats to `path` at exit."""
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def dump():
+        profiler.disable()
+        profiler.dump_stats(path)
+    atexit.register(dump)
+    return profiler
+
+if os.environ.get("DSC_METRICS"):
+    atexit.register(write_metrics, os.environ["DSC_METRICS"])
+if os.environ.get("DSC_PROFILE"):
+    start_profiling(os.environ["DSC_PROFILE"])
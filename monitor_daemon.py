@@ -0,0 +1,226 @@
+"""Asyncio monitoring service for the Disk Space Calculator.
+
+Polls a set of volume sources on a schedule and evaluates each volume against
+its target free space percentage. A volume is only re-evaluated when its
+numbers move by a material amount, and alerts use a hysteresis band: an alert
+is raised when free space drops below the target and only cleared once it
+climbs back above target + hysteresis, so volumes hovering around the
+threshold do not cause alert storms.
+
+Usage:
+    python monitor_daemon.py [PATH ...] --target 15 [--interval 60] [--hysteresis 2]
+"""
+import argparse
+import asyncio
+import inspect
+import sys
+import time
+from collections import namedtuple
+
+from disk_space_core import DiskSpaceModel
+from volume_scanner import DEFAULT_TIMEOUT, scan_volumes
+
+DEFAULT_INTERVAL = 60.0
+DEFAULT_HYSTERESIS = 2.0
+DEFAULT_MIN_CHANGE_PCT = 0.5
+
+VolumeReading = namedtuple("VolumeReading", ["key", "total_space_gb", "free_space_gb"])
+AlertEvent = namedtuple("AlertEvent", ["kind", "key", "model", "additional_space_needed_gb", "timestamp"])
+
+ALERT = "alert"
+CLEAR = "clear"
+
+##################################################
+# Sources
+##################################################
+class StaticSource:
+    """In-memory source; replace `readings` between polls to simulate change.
+
+    Useful as a local fake when testing the monitor.
+    """
+
+    def __init__(self, readings=()):
+        self.readings = list(readings)
+
+    def set(self, key, total_space_gb, free_space_gb):
+        self.readings = [r for r in self.readings if r.key != key]
+        self.readings.append(VolumeReading(key, total_space_gb, free_space_gb))
+
+    async def poll(self):
+        return list(self.readings)
+
+class ScannerSource:
+    """Reads local mounts (or the given paths) with volume_scanner off the event loop."""
+
+    def __init__(self, paths=None, timeout=DEFAULT_TIMEOUT):
+        self.paths = paths
+        self.timeout = timeout
+
+    async def poll(self):
+        scans = await asyncio.to_thread(scan_volumes, self.paths, self.timeout)
+        return [
+            VolumeReading(scan.path, scan.total_space_gb, scan.free_space_gb)
+            for scan in scans if scan.error is None
+        ]
+
+##################################################
+# Monitor
+##################################################
+class VolumeState:
+    __slots__ = ("total_space_gb", "free_space_gb", "alerting")
+
+    def __init__(self):
+        self.total_space_gb = None
+        self.free_space_gb = None
+        self.alerting = False
+
+class DiskSpaceMonitor:
+    """Polls sources and emits AlertEvents with hysteresis.
+
+    `on_event` may be a plain function or a coroutine function.
+    """
+
+    def __init__(self, sources, target_free_percentage, on_event=None, interval=DEFAULT_INTERVAL,
+                 hysteresis=DEFAULT_HYSTERESIS, min_change_pct=DEFAULT_MIN_CHANGE_PCT, poll_timeout=None):
+        if not 0 <= target_free_percentage < 100.0:
+            raise ValueError("Target free space percentage must be between 0 and 100.")
+        self.sources = list(sources)
+        self.target_free_percentage = target_free_percentage
+        self.on_event = on_event
+        self.interval = interval
+        self.hysteresis = hysteresis
+        self.min_change_pct = min_change_pct
+        self.poll_timeout = poll_timeout if poll_timeout is not None else interval
+        self.states = {}
+        self.evaluations = 0
+        self._stopping = asyncio.Event()
+
+    def _changed_materially(self, state, reading):
+        if state.total_space_gb is None or reading.total_space_gb != state.total_space_gb:
+            return True
+        # Always re-evaluate a reading that crosses the edge of the hysteresis band
+        free_pct = reading.free_space_gb / reading.total_space_gb * 100
+        if state.alerting and free_pct >= self.target_free_percentage + self.hysteresis:
+            return True
+        if not state.alerting and free_pct < self.target_free_percentage:
+            return True
+        # Otherwise movement is measured in percentage points of the volume's capacity
+        threshold_gb = reading.total_space_gb * self.min_change_pct / 100.0
+        return abs(reading.free_space_gb - state.free_space_gb) >= threshold_gb
+
+    def evaluate(self, reading, now=None):
+        """Updates state for one reading and returns an AlertEvent or None."""
+        if not reading.total_space_gb:
+            return None
+        state = self.states.get(reading.key)
+        if state is None:
+            state = self.states[reading.key] = VolumeState()
+        if not self._changed_materially(state, reading):
+            return None
+
+        state.total_space_gb = reading.total_space_gb
+        state.free_space_gb = reading.free_space_gb
+        self.evaluations += 1
+
+        model = DiskSpaceModel()
+        model.set_total_space_gb(reading.total_space_gb)
+        model.set_free_space_gb(reading.free_space_gb)
+        model.target_free_percentage = self.target_free_percentage
+        free_pct = model.get_free_percentage()
+
+        if not state.alerting and free_pct < self.target_free_percentage:
+            state.alerting = True
+            kind = ALERT
+        elif state.alerting and free_pct >= self.target_free_percentage + self.hysteresis:
+            state.alerting = False
+            kind = CLEAR
+        else:
+            return None
+        return AlertEvent(kind, reading.key, model, model.get_additional_space_needed_gb(),
+                          time.time() if now is None else now)
+
+    async def _poll_source(self, source):
+        try:
+            return await asyncio.wait_for(source.poll(), self.poll_timeout)
+        except asyncio.TimeoutError:
+            print(f"{type(source).__name__}: poll timed out after {self.poll_timeout:g} s", file=sys.stderr)
+        except Exception as e:
+            print(f"{type(source).__name__}: poll failed ({e})", file=sys.stderr)
+        return []
+
+    async def _emit(self, event):
+        if self.on_event is None:
+            return
+        result = self.on_event(event)
+        if inspect.isawaitable(result):
+            await result
+
+    async def poll_once(self):
+        """Polls every source concurrently and returns the events raised."""
+        batches = await asyncio.gather(*(self._poll_source(source) for source in self.sources))
+        events = []
+        for readings in batches:
+            for reading in readings:
+                event = self.evaluate(reading)
+                if event is not None:
+                    events.append(event)
+                    await self._emit(event)
+        return events
+
+    async def run(self, iterations=None):
+        """Polls on the configured interval until stop() is called."""
+        count = 0
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            await self.poll_once()
+            count += 1
+            if iterations is not None and count >= iterations:
+                break
+            delay = max(0.0, self.interval - (time.monotonic() - started))
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        self._stopping.set()
+
+##################################################
+# Command Line
+##################################################
+def print_event(event):
+    free_pct = event.model.get_free_percentage()
+    if event.kind == ALERT:
+        print(f"ALERT {event.key}: {free_pct:.2f}% free, add {event.additional_space_needed_gb} GB "
+              f"to reach {event.model.target_free_percentage:.2f}%", flush=True)
+    else:
+        print(f"CLEAR {event.key}: {free_pct:.2f}% free", flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Continuously monitor volumes for low free space.")
+    parser.add_argument("paths", nargs="*", help="Paths to monitor (default: all mounted filesystems)")
+    parser.add_argument("--target", type=float, required=True, help="Target free space percentage")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Seconds between polls")
+    parser.add_argument("--hysteresis", type=float, default=DEFAULT_HYSTERESIS,
+                        help="Percentage points above target needed to clear an alert")
+    parser.add_argument("--min-change", type=float, default=DEFAULT_MIN_CHANGE_PCT,
+                        help="Percentage points of capacity a volume must move before it is re-evaluated")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Per-volume scan timeout")
+    args = parser.parse_args(argv)
+
+    monitor = DiskSpaceMonitor(
+        [ScannerSource(args.paths or None, args.timeout)],
+        args.target,
+        on_event=print_event,
+        interval=args.interval,
+        hysteresis=args.hysteresis,
+        min_change_pct=args.min_change,
+    )
+    try:
+        asyncio.run(monitor.run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
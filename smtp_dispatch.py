@@ -0,0 +1,181 @@
+"""SMTP delivery backend for low disk space alert emails.
+
+Replaces one mailto: link per alert with direct SMTP delivery. A small pool
+of SMTP connections is reused across messages, a bounded number of messages
+are in flight at once, and failed sends are retried with backoff (reconnecting
+if the server dropped the connection).
+
+Example:
+    with SmtpDispatcher("smtp.example.com", sender="noc@example.com") as dispatcher:
+        results = dispatcher.send_many(messages)
+"""
+import functools
+import queue
+import smtplib
+import socket
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MAX_PENDING = 100
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY = 1.0
+DEFAULT_TIMEOUT = 30.0
+
+SendResult = namedtuple("SendResult", ["recipients", "subject", "attempts", "error"])
+
+@functools.lru_cache(maxsize=None)
+def _message_id_domain():
+    # make_msgid() would look the host name up again for every message
+    return socket.getfqdn()
+
+def build_message(sender, recipients, subject, body):
+    """Builds the EmailMessage sent for one alert."""
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    # Date is required by RFC 5322; Message-ID lets replies and retries be traced
+    message["Date"] = formatdate(localtime=True)
+    message["Message-ID"] = make_msgid(domain=_message_id_domain())
+    message.set_content(body)
+    return message
+
+def _is_retryable(error):
+    """Dropped connections, network errors and 4xx replies are worth retrying."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError, so check it before plain network errors
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+class SmtpDispatcher:
+    """Sends messages over a pool of reusable SMTP connections."""
+
+    def __init__(self, host, port=25, sender=None, username=None, password=None, starttls=False,
+                 pool_size=DEFAULT_POOL_SIZE, max_pending=DEFAULT_MAX_PENDING,
+                 max_retries=DEFAULT_MAX_RETRIES, retry_delay=DEFAULT_RETRY_DELAY, timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+
+        self._connections = queue.LifoQueue()
+        self._all_connections = []
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="smtp")
+
+    def _connect(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        with self._lock:
+            self._all_connections.append(connection)
+        return connection
+
+    def _acquire(self):
+        try:
+            connection = self._connections.get_nowait()
+        except queue.Empty:
+            return self._connect()
+        return connection
+
+    def _release(self, connection):
+        self._connections.put(connection)
+
+    def _discard(self, connection):
+        with self._lock:
+            if connection in self._all_connections:
+                self._all_connections.remove(connection)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _send(self, message):
+        recipients = [addr.strip() for addr in str(message.get("To", "")).split(",") if addr.strip()]
+        attempts = 0
+        while True:
+            attempts += 1
+            connection = None
+            try:
+                connection = self._acquire()
+                connection.send_message(message)
+            except Exception as e:
+                if connection is not None:
+                    if isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                        # The session is still usable after a rejected message; reset it for the next one
+                        try:
+                            connection.rset()
+                            self._release(connection)
+                        except Exception:
+                            self._discard(connection)
+                    else:
+                        self._discard(connection)
+                if attempts > self.max_retries or not _is_retryable(e):
+                    return SendResult(recipients, message["Subject"], attempts, str(e) or type(e).__name__)
+                time.sleep(self.retry_delay * 2 ** (attempts - 1))
+            else:
+                self._release(connection)
+                return SendResult(recipients, message["Subject"], attempts, None)
+
+    def _run(self, message):
+        try:
+            return self._send(message)
+        finally:
+            self._pending.release()
+
+    def submit(self, recipients, subject, body):
+        """Queues one alert and returns a Future resolving to a SendResult.
+
+        Blocks while the maximum number of messages are already in flight.
+        """
+        return self.submit_message(build_message(self.sender, recipients, subject, body))
+
+    def submit_message(self, message):
+        """Queues a prebuilt EmailMessage; see submit()."""
+        self._pending.acquire()
+        try:
+            return self._executor.submit(self._run, message)
+        except BaseException:
+            self._pending.release()
+            raise
+
+    def send_many(self, alerts):
+        """Sends (recipients, subject, body) tuples and returns their SendResults in order."""
+        futures = [self.submit(recipients, subject, body) for recipients, subject, body in alerts]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Waits for queued messages and closes every pooled connection."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            connections, self._all_connections = self._all_connections, []
+        for connection in connections:
+            try:
+                connection.quit()
+            except Exception:
+                connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,167 @@
+"""What-if sweeps of target free space percentages across a fleet.
+
+Evaluates the closed-form additional space (T*P - F) / (1 - P) for a grid of
+targets x volumes. The per-volume columns and the zero-total mask are prepared
+once, so each extra target column costs a single O(volumes) pass. Results match
+DiskSpaceModel.get_additional_space_needed_gb exactly; NaN marks the cases
+where it would return None.
+
+Usage:
+    python target_sweep.py volumes.csv --targets 10,15,20 [--matrix]
+"""
+import argparse
+import csv
+import math
+import sys
+from array import array
+from collections import namedtuple
+
+from disk_space_core import load_numpy, parse_size_gb
+from instrumentation import instrumented
+
+SweepTotal = namedtuple("SweepTotal", ["target_free_percentage", "additional_space_needed_gb", "volumes_needing_space"])
+
+class TargetSweep:
+    """Additional space needed for every volume of a fleet at several targets."""
+
+    def __init__(self, total_space_gb, free_space_gb):
+        np = load_numpy()
+        if len(total_space_gb) != len(free_space_gb):
+            raise ValueError("Total and free space columns must be the same length.")
+        if np is not None:
+            self._T = np.asarray(total_space_gb, dtype=np.float64)
+            self._F = np.asarray(free_space_gb, dtype=np.float64)
+            self._zero_total = self._T == 0
+        else:
+            self._T = array('d', total_space_gb)
+            self._F = array('d', free_space_gb)
+            self._zero_total = [T == 0 for T in self._T]
+        self.targets = []
+        self.columns = []
+
+    @classmethod
+    def from_fleet(cls, fleet):
+        return cls(fleet.total_space_gb, fleet.current_free_space_gb)
+
+    def __len__(self):
+        return len(self._T)
+
+    @instrumented("sweep.add_target")
+    def add_target(self, target_free_percentage):
+        """Evaluates one more target for every volume and returns that column."""
+        P = target_free_percentage / 100.0
+        if load_numpy() is not None:
+            column = self._column_numpy(P)
+        else:
+            column = self._column_array(P)
+        self.targets.append(target_free_percentage)
+        self.columns.append(column)
+        return column
+
+    def _column_numpy(self, P):
+        np = load_numpy()
+        if P >= 1.0:
+            return np.full(len(self._T), np.nan)
+        # Same operation order as DiskSpaceModel so results match bit for bit
+        A = (self._T * P - self._F) / (1.0 - P)
+        column = np.where(A > 0, np.ceil(A), 0.0)
+        column[self._zero_total] = np.nan
+        return column
+
+    def _column_array(self, P):
+        count = len(self._T)
+        column = array('d', bytes(8 * count))
+        if P >= 1.0:
+            for i in range(count):
+                column[i] = math.nan
+            return column
+        denominator = 1.0 - P
+        ceil = math.ceil
+        for i, (T, F, zero) in enumerate(zip(self._T, self._F, self._zero_total)):
+            if zero:
+                column[i] = math.nan
+                continue
+            A = (T * P - F) / denominator
+            column[i] = ceil(A) if A > 0 else 0
+        return column
+
+    def sweep(self, targets):
+        """Adds several targets and returns the full matrix."""
+        for target in targets:
+            self.add_target(target)
+        return self.matrix()
+
+    def matrix(self):
+        """Returns a targets x volumes matrix (2-D ndarray, or a list of array('d') rows)."""
+        np = load_numpy()
+        if np is not None:
+            return np.vstack(self.columns) if self.columns else np.empty((0, len(self)))
+        return list(self.columns)
+
+    def totals(self):
+        """Returns a SweepTotal per target: fleet-wide GB needed and volumes needing space."""
+        np = load_numpy()
+        result = []
+        for target, column in zip(self.targets, self.columns):
+            if np is not None:
+                positive = column > 0
+                result.append(SweepTotal(target, int(column[positive].sum()), int(positive.sum())))
+                continue
+            needed = 0
+            volumes = 0
+            for value in column:
+                if value > 0:
+                    needed += int(value)
+                    volumes += 1
+            result.append(SweepTotal(target, needed, volumes))
+        return result
+
+##################################################
+# Command Line
+##################################################
+def parse_targets(text):
+    """Parses "10,15,20" into [10.0, 15.0, 20.0]."""
+    targets = [float(part) for part in text.replace(" ", "").split(",") if part]
+    if any(not 0 <= t < 100.0 for t in targets):
+        raise ValueError("Target free space percentages must be between 0 and 100.")
+    return targets
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the space needed at several target free space percentages.")
+    parser.add_argument("input", help="CSV with server, volume, total and free columns")
+    parser.add_argument("--targets", required=True, help="Comma-separated target percentages, e.g. 10,15,20")
+    parser.add_argument("--unit", default="GB", help="Unit of sizes without a suffix")
+    parser.add_argument("--matrix", action="store_true", help="Print the per-volume matrix as CSV")
+    args = parser.parse_args(argv)
+
+    try:
+        targets = parse_targets(args.targets)
+    except ValueError as e:
+        parser.error(str(e))
+
+    keys, totals, frees = [], [], []
+    with open(args.input, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            total = parse_size_gb(row.get("total") or "", args.unit)
+            free = parse_size_gb(row.get("free") or "", args.unit)
+            if total is None or free is None:
+                continue
+            keys.append((row.get("server", ""), row.get("volume", "")))
+            totals.append(total)
+            frees.append(free)
+
+    sweep = TargetSweep(totals, frees)
+    matrix = sweep.sweep(targets)
+
+    if args.matrix:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["server", "volume"] + [f"{t:g}%" for t in targets])
+        for i, (server, volume) in enumerate(keys):
+            writer.writerow([server, volume] + ["" if math.isnan(row[i]) else int(row[i]) for row in matrix])
+    for total in sweep.totals():
+        print(f"{total.target_free_percentage:6.2f}% target: {total.additional_space_needed_gb} GB "
+              f"across {total.volumes_needing_space} volumes", file=sys.stderr if args.matrix else sys.stdout)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
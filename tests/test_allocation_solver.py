@@ -0,0 +1,72 @@
+"""Allocation policies on hand-checked needs, and reading fleets from CSV."""
+import io
+import unittest
+
+from allocation_solver import MAX_VOLUMES, MIN_SHORTFALL, read_fleet_csv, solve
+
+class SolveTest(unittest.TestCase):
+
+    def assertPlan(self, needs, budget, policy, allocated, volumes_met, worst_shortfall):
+        plan = solve(needs, budget, policy)
+        self.assertEqual(list(plan.allocated_gb), allocated)
+        self.assertEqual(plan.spent_gb, sum(allocated))
+        self.assertEqual(plan.remaining_gb, budget - sum(allocated))
+        self.assertEqual(plan.volumes_met, volumes_met)
+        self.assertEqual(plan.worst_shortfall_gb, worst_shortfall)
+
+    def test_max_volumes_fills_smallest_needs_first(self):
+        self.assertPlan([5, 1, 3, 0, 8], 9, MAX_VOLUMES, [5, 1, 3, 0, 0], 3, 8)
+        # No single need fits, so nothing is spent
+        self.assertPlan([10, 10, 10], 7, MAX_VOLUMES, [0, 0, 0], 0, 10)
+
+    def test_min_shortfall_levels_largest_needs(self):
+        # 7 GB over three 10 GB needs: level 8 costs 6, the spare 1 GB goes to the first volume
+        self.assertPlan([10, 10, 10], 7, MIN_SHORTFALL, [3, 2, 2], 0, 8)
+        # Level 3 costs 7 (8->3, 5->3); the spare 2 GB lower the first two volumes still above 2
+        self.assertPlan([5, 1, 3, 0, 8], 9, MIN_SHORTFALL, [3, 0, 1, 0, 5], 0, 3)
+        self.assertPlan([20, 4, 9], 10, MIN_SHORTFALL, [10, 0, 0], 0, 10)
+
+    def test_budget_above_total_need(self):
+        for policy in (MAX_VOLUMES, MIN_SHORTFALL):
+            with self.subTest(policy=policy):
+                self.assertPlan([5, 1, 3, 0], 100, policy, [5, 1, 3, 0], 3, 0)
+
+    def test_zero_budget_and_no_needs(self):
+        for policy in (MAX_VOLUMES, MIN_SHORTFALL):
+            with self.subTest(policy=policy):
+                self.assertPlan([4, 2], 0, policy, [0, 0], 0, 4)
+                self.assertPlan([], 5, policy, [], 0, 0)
+
+    def test_rejects_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            solve([1], -1)
+        with self.assertRaises(ValueError):
+            solve([1], 1, "round-robin")
+
+class ReadFleetCsvTest(unittest.TestCase):
+
+    def test_skips_bad_rows_and_solves_the_rest(self):
+        rows = io.StringIO(
+            "server,volume,total,free,target\n"
+            "srv01,C:,100,10,15\n"
+            "srv01,D:,100,10,abc\n"
+            "srv01,E:,100,10,100\n"
+            "srv01,F:,100,10,-5\n"
+            "srv01,G:,100,200,15\n"
+            "srv02,C:,1T,1000G,\n"
+        )
+        keys, fleet = read_fleet_csv(rows)
+        self.assertEqual(keys, [("srv01", "C:"), ("srv02", "C:")])
+        plan = solve(fleet, 10, MAX_VOLUMES)
+        # srv01 C: needs (15 - 10) / 0.85 = 5.9, rounded up to 6 GB; srv02 C: has no target
+        self.assertEqual(list(plan.needed_gb), [6, 0])
+        self.assertEqual(list(plan.allocated_gb), [6, 0])
+
+    def test_default_target_applies_to_every_row(self):
+        keys, fleet = read_fleet_csv(io.StringIO("server,volume,total,free\nsrv01,C:,100,10\n"), default_target=20)
+        self.assertEqual(keys, [("srv01", "C:")])
+        # (20 - 10) / 0.8 = 12.5, rounded up to 13 GB
+        self.assertEqual(list(solve(fleet, 0).needed_gb), [13])
+
+if __name__ == "__main__":
+    unittest.main()
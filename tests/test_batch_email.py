@@ -0,0 +1,39 @@
+"""Batch rendering skips bad rows instead of stopping."""
+import io
+import unittest
+
+from batch_email import read_rows, render_alerts
+
+ROWS = """\
+{"server": "s1", "volume": "C:", "client": "AB", "total": 100, "free": 5, "target": 15}
+{"server": "s1", "volume": "D:",
+[1, 2]
+{"server": "s1", "volume": "E:", "client": "AB", "total": [1], "free": 5}
+{"server": "s1", "volume": "F:", "client": "AB", "total": 1e999, "free": 5}
+{"server": "s1", "volume": "G:", "client": "AB", "total": %d, "free": 5}
+{"server": "s1", "volume": "H:", "client": null, "total": 100, "free": 5}
+{"server": "s1", "volume": "I:", "client": "AB", "total": 100, "free": 5, "target": "abc"}
+{"server": "s1", "volume": "J:", "client": "AB", "total": 100, "free": 5, "target": ""}
+""" % 10 ** 400
+
+class RenderAlertsTest(unittest.TestCase):
+
+    def render(self, text, fmt):
+        errors = io.StringIO()
+        alerts = list(render_alerts(read_rows(io.StringIO(text), fmt), errors=errors))
+        return alerts, errors.getvalue().splitlines()
+
+    def test_bad_jsonl_rows_are_reported_and_skipped(self):
+        alerts, errors = self.render(ROWS, "jsonl")
+        self.assertEqual([alert["volume"] for alert in alerts], ["C:", "J:"])
+        self.assertEqual([error.split(":")[0] for error in errors], [f"Row {n}" for n in range(2, 9)])
+        self.assertIn("server, volume and client are required", errors[5])
+        self.assertIn("target free space percentage must be a number", errors[6])
+
+    def test_short_csv_row_is_not_rendered_with_none(self):
+        alerts, errors = self.render("server,volume,client,total,free\ns1,C:\n", "csv")
+        self.assertEqual(alerts, [])
+        self.assertEqual(errors, ["Row 1: skipped (server, volume and client are required)"])
+
+if __name__ == "__main__":
+    unittest.main()
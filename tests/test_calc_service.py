@@ -0,0 +1,51 @@
+"""Email rendering flags and Content-Length handling of the calculator service."""
+import http.client
+import socket
+import threading
+import unittest
+
+from calc_service import CalculatorServer, calculate_volume
+
+VOLUME = {"server": "srv01", "volume": "D:", "client": "ACME", "total": 100, "free": 10, "target": 15}
+CLEANUP_LINE = "After running cleanup tools"
+
+class CalculateVolumeTest(unittest.TestCase):
+
+    def test_cleanup_ran_is_parsed_not_truth_tested(self):
+        for value, expected in [("false", False), ("no", False), ("0", False), (None, False),
+                                (False, False), ("true", True), ("yes", True), (True, True)]:
+            with self.subTest(value=value):
+                body = calculate_volume(dict(VOLUME, cleanup_ran=value), render_email=True)["body"]
+                self.assertEqual(CLEANUP_LINE in body, expected)
+
+    def test_null_text_fields_skip_the_email(self):
+        result = calculate_volume(dict(VOLUME, client=None), render_email=True)
+        self.assertNotIn("body", result)
+
+class ContentLengthTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = CalculatorServer(("127.0.0.1", 0), workers=1)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def _post(self, content_length):
+        with socket.create_connection(self.server.server_address, timeout=5) as sock:
+            sock.sendall(b"POST /v1/volume HTTP/1.1\r\nHost: localhost\r\n"
+                         b"Content-Length: " + content_length + b"\r\n\r\n")
+            response = http.client.HTTPResponse(sock)
+            response.begin()
+            response.read()
+            return response.status, response.getheader("Connection")
+
+    def test_invalid_lengths_get_400_and_close(self):
+        for value in (b"-1", b"abc", b"1.5", b""):
+            with self.subTest(value=value):
+                self.assertEqual(self._post(value), (400, "close"))
+
+    def test_oversized_body_gets_413_and_close(self):
+        self.assertEqual(self._post(b"99999999999"), (413, "close"))
+
+if __name__ == "__main__":
+    unittest.main()
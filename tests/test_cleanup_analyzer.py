@@ -0,0 +1,63 @@
+"""Cleanup analysis with the incremental listing cache."""
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+
+from cleanup_analyzer import analyze, main
+
+OLD_MTIME = time.mktime((2020, 1, 1, 0, 0, 0, 0, 0, -1))
+
+class CleanupAnalyzerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = os.path.join(directory.name, "tree")
+        self.cache = os.path.join(directory.name, "cache.json")
+        os.makedirs(os.path.join(self.root, "a"))
+        self.big = os.path.join(self.root, "a", "big.dat")
+        with open(self.big, "wb") as f:
+            f.write(b"\0" * 4096)
+        os.utime(self.big, (OLD_MTIME, OLD_MTIME))
+
+    def scan(self):
+        return analyze(self.root, old_days=180, workers=2, cache_path=self.cache, min_size=1024)
+
+    def old_paths(self, report):
+        return [candidate.path for candidate in report.old_files]
+
+    def test_file_changed_in_place_is_not_reported_from_cache(self):
+        self.assertEqual(self.old_paths(self.scan()), [self.big])
+        directory_mtime = os.stat(os.path.dirname(self.big)).st_mtime_ns
+        with open(self.big, "ab") as f:
+            f.write(b"\0" * 4096)
+        self.assertEqual(os.stat(os.path.dirname(self.big)).st_mtime_ns, directory_mtime)
+
+        report = self.scan()
+        self.assertGreater(report.cached_directories, 0)
+        self.assertEqual(report.old_files, [])
+        self.assertEqual(report.scanned_bytes, 8192)
+
+    def test_deleted_file_is_dropped_from_cached_listing(self):
+        self.scan()
+        directory_times = os.stat(os.path.dirname(self.big))
+        os.remove(self.big)
+        # Keep the directory mtime as cached, as on filesystems with coarse timestamps
+        os.utime(os.path.dirname(self.big), ns=(directory_times.st_atime_ns, directory_times.st_mtime_ns))
+        report = self.scan()
+        self.assertEqual(report.old_files, [])
+        self.assertEqual(report.scanned_bytes, 0)
+
+    def test_missing_path_is_a_usage_error(self):
+        stderr = io.StringIO()
+        for path in (os.path.join(self.root, "missing"), self.big):
+            with self.subTest(path=path), contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as raised:
+                main([path, "--target", "15"])
+            self.assertEqual(raised.exception.code, 2)
+        self.assertIn("not an existing directory", stderr.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
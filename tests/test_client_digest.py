@@ -0,0 +1,48 @@
+"""Client digests do not depend on input order or on the number of worker processes."""
+import io
+import random
+import unittest
+
+from client_digest import render_digests, write_jsonl
+
+def _rows():
+    rnd = random.Random(7)
+    rows = []
+    for client in ("AB", "CD", "EF", "GH", "IJ"):
+        for server in range(rnd.randrange(1, 4)):
+            for volume in "CDEF"[:rnd.randrange(1, 5)]:
+                total = rnd.randrange(100, 5000)
+                rows.append({"server": f"{client.lower()}-srv{server:02d}", "volume": f"{volume}:", "client": client,
+                             "total": total, "free": rnd.randrange(0, total), "target": rnd.choice([10, 15, 20, ""]),
+                             "cleanup_ran": rnd.choice(["true", "false"])})
+    # Rows that are skipped with an error
+    rows.append({"server": "ab-srv09", "volume": "Z:", "client": "AB", "total": 100, "free": 500})
+    rows.append({"server": "", "volume": "Y:", "client": "CD", "total": 100, "free": 5})
+    rows.append({"server": "xx-srv01", "volume": "C:", "client": "", "total": 100, "free": 5})
+    return rows
+
+class RenderDigestsTest(unittest.TestCase):
+
+    def render(self, rows, workers):
+        out = io.StringIO()
+        errors = io.StringIO()
+        count = write_jsonl(render_digests(rows, workers=workers, errors=errors), out)
+        return count, out.getvalue(), errors.getvalue().splitlines()
+
+    def test_output_is_identical_for_any_order_and_worker_count(self):
+        rows = _rows()
+        count, expected, _ = self.render(rows, 1)
+        self.assertEqual(count, 5)
+        rnd = random.Random(3)
+        for attempt in range(3):
+            shuffled = rows[:]
+            rnd.shuffle(shuffled)
+            serial = self.render(shuffled, 1)
+            self.assertEqual(serial[1], expected)
+            self.assertEqual(len(serial[2]), 3)
+            for workers in (2, 3):
+                with self.subTest(attempt=attempt, workers=workers):
+                    self.assertEqual(self.render(shuffled, workers), serial)
+
+if __name__ == "__main__":
+    unittest.main()
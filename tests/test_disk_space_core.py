@@ -0,0 +1,111 @@
+"""DiskSpaceModel caching and observers, and the size parsers."""
+import math
+import unittest
+
+from disk_space_core import DiskSpaceModel, parse_size_buffer, parse_size_gb, parse_sizes_gb, split_size
+
+# (text, keyword arguments, GB)
+VALID_SIZES = [
+    ("1.5T", {}, 1536.0),
+    ("512 GiB", {}, 512.0),
+    ("980M", {}, 980 / 1024),
+    ("2.3PB", {}, 2.3 * 1024 ** 2),
+    ("1,024G", {}, 1024.0),
+    ("1,024.5 GB", {}, 1024.5),
+    ("  40  ", {}, 40.0),
+    ("40", {"default_unit": "TB"}, 40 * 1024.0),
+    ("2048 bytes", {}, 2048 / 1024 ** 3),
+    ("1 KiB", {"decimal": True}, 1 / 1024 ** 2),
+    ("1.5TB", {"decimal": True}, 1.5e12 / 1024 ** 3),
+    ("1.5T", {"decimal": True}, 1.5e12 / 1024 ** 3),
+    ("0", {}, 0.0),
+    (12, {}, 12.0),
+]
+
+INVALID_SIZES = ["1,5T", "12,34G", ",024G", "-1G", "-1", "nan", "inf", "NaN GB", "1e999", "", "GB", "5 parsecs", "1.2.3G"]
+
+class DiskSpaceModelObserverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = DiskSpaceModel()
+        self.calls = []
+        self.model.add_observer(lambda model: self.calls.append(model.get_free_percentage()))
+
+    def test_observer_fires_when_total_leaves_zero(self):
+        # Free 0 of total 0 and of total 100 have the same percentages, but only the latter has results
+        self.model.set_total_space_gb(100)
+        self.assertEqual(self.calls, [0])
+
+    def test_observer_skips_changes_that_leave_results_alone(self):
+        self.model.set_total_space_gb(100)
+        self.model.set_free_space_gb(10)
+        self.model.set_free_space_gb(10)
+        self.model.target_free_percentage = None
+        self.assertEqual(self.calls, [0, 10])
+
+    def test_cached_values_follow_inputs(self):
+        self.model.set_total_space_gb(100)
+        self.model.set_free_space_gb(10)
+        self.model.target_free_percentage = 15
+        self.assertEqual(self.model.get_additional_space_needed_gb(), 6)
+        self.model.set_free_space_gb(20)
+        self.assertEqual(self.model.get_additional_space_needed_gb(), 0)
+
+class SizeParsingTest(unittest.TestCase):
+
+    def test_valid_sizes(self):
+        for text, kwargs, expected in VALID_SIZES:
+            with self.subTest(text=text, **kwargs):
+                self.assertAlmostEqual(parse_size_gb(text, **kwargs), expected, places=9)
+
+    def test_invalid_sizes(self):
+        for text in INVALID_SIZES:
+            with self.subTest(text=text):
+                self.assertIsNone(parse_size_gb(text))
+        for value in (-1, math.nan, math.inf):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_size_gb(value))
+
+    def test_unsupported_default_unit(self):
+        with self.assertRaises(ValueError):
+            parse_size_gb("40", default_unit="XB")
+
+    def test_column_matches_scalar_parser(self):
+        texts = [text for text, kwargs, _ in VALID_SIZES if not kwargs] + INVALID_SIZES + [None]
+        column = parse_sizes_gb(texts)
+        self.assertEqual(len(column), len(texts))
+        for text, value in zip(texts, column):
+            with self.subTest(text=text):
+                expected = None if text is None else parse_size_gb(text)
+                if expected is None:
+                    self.assertTrue(math.isnan(value))
+                else:
+                    self.assertEqual(value, expected)
+
+    def test_column_decimal(self):
+        self.assertEqual(list(parse_sizes_gb(["1TB", "1TiB"], decimal=True)), [1e12 / 1024 ** 3, 1024.0])
+
+    def test_buffer(self):
+        for buffer in ("1.5T\n-1G\n1,5T\n512 GiB\nnan", b"1.5T\r\n-1G\r\n1,5T\r\n512 GiB\r\nnan"):
+            with self.subTest(buffer=buffer):
+                values = parse_size_buffer(buffer)
+                self.assertEqual([value for value in values if not math.isnan(value)], [1536.0, 512.0])
+                self.assertEqual(sum(math.isnan(value) for value in values), 3)
+
+    def test_buffer_non_ascii_is_nan(self):
+        self.assertTrue(math.isnan(parse_size_buffer("1\u00a0GB".encode())[0]))
+
+    def test_split_size(self):
+        cases = [
+            ("1,024.5 GiB", ("1024.5", "GiB")),
+            ("1.5T", ("1.5", "T")),
+            ("40", ("40", "")),
+            ("1,5T", (None, "T")),
+            ("  980M  ", ("980", "M")),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(split_size(text), expected)
+
+if __name__ == "__main__":
+    unittest.main()
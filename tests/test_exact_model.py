@@ -0,0 +1,39 @@
+"""ExactDiskSpaceModel and ExactFleet agreement."""
+import random
+import unittest
+
+from exact_model import NO_RESULT, ExactDiskSpaceModel, ExactFleet, parse_size_bytes
+
+class ExactModelTest(unittest.TestCase):
+
+    def test_fleet_matches_scalar_model(self):
+        rnd = random.Random(20)
+        totals, frees, targets, granularities = [], [], [], []
+        for _ in range(2000):
+            total = rnd.randrange(1, 10 ** 15)
+            totals.append(total)
+            frees.append(rnd.randrange(0, total + 1))
+            targets.append(rnd.choice([None, 0, 100, round(rnd.uniform(0, 99.999), rnd.choice([0, 2, 6]))]))
+            granularities.append(rnd.choice([1, 4096, 10 ** 6, 2 ** 30]))
+        additional = ExactFleet(totals, frees, targets, granularities).calculate().additional_space_needed_bytes
+        for i, fleet_bytes in enumerate(additional):
+            expected = ExactDiskSpaceModel(totals[i], frees[i], targets[i], granularities[i]).get_additional_space_needed_bytes()
+            self.assertEqual(None if fleet_bytes == NO_RESULT else fleet_bytes, expected, i)
+
+    def test_negative_targets_are_rejected_by_both(self):
+        with self.assertRaises(ValueError):
+            ExactDiskSpaceModel(100, 10, -1)
+        with self.assertRaises(ValueError):
+            ExactFleet([100], [10], -1)
+        with self.assertRaises(ValueError):
+            ExactFleet([100, 100], [10, 10], [15, -0.5])
+
+    def test_parse_size_bytes_reads_decimal_sizes_only(self):
+        self.assertEqual(parse_size_bytes("1.5T"), 3 * 2 ** 39)
+        self.assertEqual(parse_size_bytes("1,024 MiB"), 2 ** 30)
+        self.assertEqual(parse_size_bytes("1.5TB", decimal=True), 1500 * 10 ** 9)
+        for text in ("1/3G", "1,5T", "-1G", "nan", "2 XB", -5):
+            self.assertIsNone(parse_size_bytes(text), text)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""FleetModel against the scalar DiskSpaceModel, on both the array and NumPy paths."""
+import random
+import unittest
+from unittest import mock
+
+import disk_space_core
+from disk_space_core import DiskSpaceModel, FleetModel, load_numpy
+
+def _volumes():
+    rnd = random.Random(1)
+    volumes = [
+        (0, 0, 15),          # zero total
+        (0, 0, None),
+        (100, 10, 100),      # target of 100% or more
+        (100, 10, 150),
+        (100, 10, None),     # no target
+        (100, 50, 15),       # already above target: negative A
+        (100, 100, 99.9),
+        (100, 10, 0),
+        (100, 0, 15),
+        (1000, 149.99, 15),  # A just above a whole GB
+    ]
+    for _ in range(5000):
+        total = rnd.choice([rnd.uniform(1, 100), rnd.uniform(1, 10 ** 7), float(rnd.randrange(1, 4096))])
+        free = rnd.uniform(0, total)
+        target = rnd.choice([None, rnd.uniform(0, 99.99), round(rnd.uniform(0, 99), 1), rnd.randrange(0, 100)])
+        volumes.append((total, free, target))
+    return volumes
+
+def _scalar_rows(volumes):
+    rows = []
+    for total, free, target in volumes:
+        model = DiskSpaceModel()
+        model.set_total_space_gb(total)
+        model.set_free_space_gb(free)
+        model.target_free_percentage = target
+        rows.append((model.get_free_percentage(), model.get_used_percentage(), model.get_additional_space_needed_gb()))
+    return rows
+
+class FleetModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.volumes = _volumes()
+        self.expected = _scalar_rows(self.volumes)
+
+    def fleet_rows(self):
+        totals, frees, targets = zip(*self.volumes)
+        return FleetModel(list(totals), list(frees), list(targets)).to_rows()
+
+    def assertRowsMatch(self, rows):
+        self.assertEqual(len(rows), len(self.expected))
+        for volume, row, expected in zip(self.volumes, rows, self.expected):
+            self.assertEqual(row, expected, volume)
+
+    def test_array_path_matches_scalar_model(self):
+        with mock.patch.object(disk_space_core, "_numpy", False):
+            self.assertRowsMatch(self.fleet_rows())
+
+    @unittest.skipIf(load_numpy() is None, "NumPy is not installed")
+    def test_numpy_path_matches_scalar_model(self):
+        self.assertRowsMatch(self.fleet_rows())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""FleetStore updates, opening, CSV import and teardown while its columns are in use."""
+import contextlib
+import ctypes
+import gc
+import io
+import os
+import tempfile
+import unittest
+import warnings
+
+from fleet_store import HEADER_SIZE, FleetStore, import_csv, main
+
+class FleetStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "fleet.dsf")
+
+    def test_update_only_writes_the_fields_passed(self):
+        with FleetStore(self.path) as store:
+            index = store.put("srv01", "D:", 100.0, 10.0, 15.0)
+            store.update(index, free_space_gb=20.0)
+            self.assertEqual(store.get("srv01", "D:"), (100.0, 20.0, 15.0))
+            store.update(index, target_free_percentage=None)
+            self.assertEqual(store.get("srv01", "D:"), (100.0, 20.0, None))
+
+    def test_close_and_grow_refuse_while_columns_are_exported(self):
+        store = FleetStore(self.path, capacity=2)
+        store.put("srv01", "C:", 100.0, 10.0, 15.0)
+        store.put("srv01", "D:", 200.0, 20.0)
+        total, _, _ = store.columns()
+        # Stands in for np.asarray(), which keeps a buffer export on the mapping
+        exported = (ctypes.c_double * 2).from_buffer(total)
+
+        with self.assertRaises(BufferError):
+            store.put("srv02", "C:", 300.0, 30.0)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        with self.assertRaises(BufferError):
+            store.close()
+        # The store is still fully usable
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get("srv01", "D:"), (200.0, 20.0, None))
+        self.assertEqual(list(exported), [100.0, 200.0])
+
+        del exported
+        store.put("srv02", "C:", 300.0, 30.0)
+        store.close()
+        with FleetStore(self.path) as reopened:
+            self.assertEqual(list(reopened.keys()), [("srv01", "C:"), ("srv01", "D:"), ("srv02", "C:")])
+
+    def test_open_without_create_leaves_missing_files_alone(self):
+        with self.assertRaises(FileNotFoundError):
+            FleetStore(self.path, create=False)
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(["info", self.path])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_short_or_foreign_files_are_rejected_and_closed(self):
+        FleetStore(self.path, capacity=4).close()
+        with open(self.path, "rb") as f:
+            valid = f.read()
+        for contents in (b"", b"DSFLEET1", valid[:HEADER_SIZE], valid[:-8], b"x" * len(valid)):
+            with self.subTest(size=len(contents)):
+                with open(self.path, "wb") as f:
+                    f.write(contents)
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter("always", ResourceWarning)
+                    with self.assertRaisesRegex(ValueError, "not a fleet store file"):
+                        FleetStore(self.path)
+                    gc.collect()
+                self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+
+    def test_columns_views_are_not_kept_alive(self):
+        with FleetStore(self.path) as store:
+            store.put("srv01", "C:", 100.0, 10.0)
+            tracked = len(store._views)
+            for _ in range(100):
+                views = store.columns()
+            del views
+            gc.collect()
+            self.assertEqual(len(store._views), tracked)
+
+    def test_import_skips_bad_rows(self):
+        rows = io.StringIO(
+            "server,volume,total,free,target\n"
+            "srv01,C:,100,10,15\n"
+            "srv01,D:,100,10,abc\n"
+            "srv01,E:,100,10,100\n"
+            "srv01,F:,100,10,-5\n"
+            "srv01,G:,100,200,\n"
+            ",H:,100,10,\n"
+            "srv02,C:,1T,512G\n"
+        )
+        with FleetStore(self.path) as store:
+            self.assertEqual(import_csv(store, rows), 2)
+            self.assertEqual(store.get("srv01", "C:"), (100.0, 10.0, 15.0))
+            self.assertEqual(store.get("srv02", "C:"), (1024.0, 512.0, None))
+
+if __name__ == "__main__":
+    unittest.main()
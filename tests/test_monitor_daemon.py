@@ -0,0 +1,90 @@
+"""DiskSpaceMonitor driven by local fake sources."""
+import asyncio
+import contextlib
+import io
+import unittest
+
+from monitor_daemon import ALERT, CLEAR, DiskSpaceMonitor, StaticSource
+
+class _SlowSource:
+    async def poll(self):
+        await asyncio.sleep(10)
+        return []
+
+class _BrokenSource:
+    async def poll(self):
+        raise OSError("mount is gone")
+
+class DiskSpaceMonitorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.source = StaticSource()
+        self.events = []
+        self.monitor = DiskSpaceMonitor([self.source], 15, on_event=self.events.append,
+                                        hysteresis=2, min_change_pct=0.5)
+
+    def poll(self, free_space_gb, total_space_gb=100):
+        self.source.set("srv01:D:", total_space_gb, free_space_gb)
+        return asyncio.run(self.monitor.poll_once())
+
+    def test_alert_fires_below_target(self):
+        self.assertEqual(self.poll(20), [])
+        events = self.poll(10)
+        self.assertEqual([event.kind for event in events], [ALERT])
+        self.assertEqual(events[0].key, "srv01:D:")
+        self.assertEqual(events[0].additional_space_needed_gb, 6)
+        self.assertEqual(self.events, events)
+
+    def test_alert_fires_once_while_below_target(self):
+        self.poll(10)
+        self.assertEqual(self.poll(8), [])
+        self.assertEqual(self.poll(5), [])
+        self.assertEqual(len(self.events), 1)
+
+    def test_clear_only_after_target_plus_hysteresis(self):
+        self.poll(10)
+        # Back above target but inside the hysteresis band: still alerting
+        self.assertEqual(self.poll(15), [])
+        self.assertEqual(self.poll(16.9), [])
+        events = self.poll(17)
+        self.assertEqual([event.kind for event in events], [CLEAR])
+        # And a new dip alerts again
+        self.assertEqual([event.kind for event in self.poll(14)], [ALERT])
+
+    def test_small_changes_are_not_reevaluated(self):
+        self.poll(50)
+        self.assertEqual(self.monitor.evaluations, 1)
+        self.poll(50.4)  # 0.4 points of capacity, below min_change_pct
+        self.assertEqual(self.monitor.evaluations, 1)
+        self.poll(51)
+        self.assertEqual(self.monitor.evaluations, 2)
+
+    def test_small_change_across_target_is_still_evaluated(self):
+        self.poll(15.2)
+        events = self.poll(14.9)
+        self.assertEqual([event.kind for event in events], [ALERT])
+
+    def test_poll_timeout_and_errors_do_not_stop_other_sources(self):
+        self.source.set("srv01:D:", 100, 5)
+        monitor = DiskSpaceMonitor([_SlowSource(), _BrokenSource(), self.source], 15, poll_timeout=0.05)
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            events = asyncio.run(monitor.poll_once())
+        self.assertEqual([event.kind for event in events], [ALERT])
+        self.assertIn("_SlowSource: poll timed out", stderr.getvalue())
+        self.assertIn("_BrokenSource: poll failed (mount is gone)", stderr.getvalue())
+
+    def test_async_event_handler_is_awaited(self):
+        seen = []
+
+        async def on_event(event):
+            await asyncio.sleep(0)
+            seen.append(event.kind)
+
+        self.source.set("srv01:D:", 100, 5)
+        monitor = DiskSpaceMonitor([self.source], 15, on_event=on_event)
+        asyncio.run(monitor.run(iterations=1))
+        self.assertEqual(seen, [ALERT])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""SmtpDispatcher against a local SMTP stand-in server."""
+import socketserver
+import threading
+import unittest
+
+from smtp_dispatch import SmtpDispatcher
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib; replies to DATA come from server.data_replies."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 stand-in ready")
+        for raw in self.rfile:
+            command = raw.decode("ascii").strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250 stand-in")
+            elif command.startswith(("HELO", "MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                lines = []
+                for data_line in self.rfile:
+                    if data_line == b".\r\n":
+                        break
+                    lines.append(data_line)
+                with server.lock:
+                    reply = server.data_replies.pop(0) if server.data_replies else "250 queued"
+                    if reply.startswith("250"):
+                        server.messages.append(b"".join(lines))
+                self.reply(reply)
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("500 unknown command")
+
+class _SmtpStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SmtpHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.data_replies = []
+
+class SmtpDispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = _SmtpStandIn()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def dispatcher(self, **kwargs):
+        host, port = self.server.server_address
+        return SmtpDispatcher(host, port, sender="noc@example.com", retry_delay=0, timeout=5, **kwargs)
+
+    def test_connections_are_reused(self):
+        alerts = [("ops@example.com", f"Alert {i}", "body") for i in range(10)]
+        with self.dispatcher(pool_size=2) as dispatcher:
+            results = dispatcher.send_many(alerts)
+        self.assertTrue(all(result.error is None and result.attempts == 1 for result in results))
+        self.assertEqual(len(self.server.messages), 10)
+        self.assertLessEqual(self.server.connections, 2)
+        headers = self.server.messages[0].split(b"\r\n\r\n", 1)[0]
+        self.assertIn(b"\r\nDate: ", b"\r\n" + headers)
+        self.assertIn(b"\r\nMessage-ID: <", b"\r\n" + headers)
+
+    def test_4xx_reply_is_retried(self):
+        self.server.data_replies = ["451 try again later", "451 try again later"]
+        with self.dispatcher(pool_size=1) as dispatcher:
+            result, = dispatcher.send_many([("ops@example.com", "Alert", "body")])
+        self.assertIsNone(result.error)
+        self.assertEqual(result.attempts, 3)
+        self.assertEqual(len(self.server.messages), 1)
+        # The rejected session was reset and reused, not reopened
+        self.assertEqual(self.server.connections, 1)
+
+    def test_5xx_reply_is_not_retried(self):
+        self.server.data_replies = ["550 mailbox unavailable"]
+        with self.dispatcher(pool_size=1) as dispatcher:
+            result, = dispatcher.send_many([("ops@example.com", "Alert", "body")])
+        self.assertEqual(result.attempts, 1)
+        self.assertIn("mailbox unavailable", result.error)
+        self.assertEqual(self.server.messages, [])
+
+    def test_retries_give_up_after_max_retries(self):
+        self.server.data_replies = ["421 busy"] * 5
+        with self.dispatcher(pool_size=1, max_retries=2) as dispatcher:
+            result, = dispatcher.send_many([("ops@example.com", "Alert", "body")])
+        self.assertEqual(result.attempts, 3)
+        self.assertIsNotNone(result.error)
+
+if __name__ == "__main__":
+    unittest.main()
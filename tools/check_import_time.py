@@ -0,0 +1,73 @@
+"""Fails when importing the headless core exceeds its cold-start budget.
+
+Runs ``python -X importtime -c "import disk_space_core"`` a few times, takes
+the fastest cumulative time reported for the module and compares it with the
+budget. Also fails if tkinter (or any other GUI module) gets pulled in.
+
+Usage:
+    python tools/check_import_time.py [--budget-ms 25] [--runs 5] [--module disk_space_core]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 25.0
+FORBIDDEN_MODULES = ("tkinter", "_tkinter", "webbrowser", "numpy")
+
+
+def measure_import(module):
+    """Returns (cumulative microseconds, imported module names) for one cold import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        name = fields[2].strip()
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(fields[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"No importtime entry found for {module}.")
+    return cumulative_us, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="disk_space_core")
+    args = parser.parse_args(argv)
+
+    timings = []
+    imported = set()
+    for _ in range(args.runs):
+        cumulative_us, modules = measure_import(args.module)
+        timings.append(cumulative_us)
+        imported |= modules
+
+    best_ms = min(timings) / 1000.0
+    print(f"{args.module}: best {best_ms:.2f} ms over {args.runs} runs (budget {args.budget_ms:.2f} ms)")
+
+    failed = False
+    leaked = sorted(name for name in imported if name.split(".")[0] in FORBIDDEN_MODULES)
+    if leaked:
+        print(f"FAIL: importing {args.module} loaded {', '.join(leaked)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print(f"FAIL: import time {best_ms:.2f} ms exceeds budget of {args.budget_ms:.2f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
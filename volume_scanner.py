@@ -0,0 +1,180 @@
+"""Live volume discovery for the Disk Space Calculator.
+
+Reads the local mount table (or takes a list of paths) and queries each
+volume with shutil.disk_usage on a pool of worker threads. Every volume is
+bounded by its own timeout, so one hung network mount cannot stall the sweep:
+the stuck worker is abandoned (it is a daemon thread) and replaced.
+
+Usage:
+    python volume_scanner.py [PATH ...] [--target 15] [--timeout 5]
+"""
+import argparse
+import os
+import queue
+import shutil
+import string
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from disk_space_core import BYTES_PER_GB, DiskSpaceModel, FleetModel
+from instrumentation import instrumented
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_WORKERS = 8
+
+# Linux filesystem types that never hold user data
+PSEUDO_FILESYSTEMS = {
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs",
+    "devpts", "devtmpfs", "efivarfs", "fusectl", "hugetlbfs", "mqueue", "nsfs",
+    "proc", "pstore", "ramfs", "rpc_pipefs", "securityfs", "squashfs", "sysfs",
+    "tmpfs", "tracefs", "overlay",
+}
+
+VolumeScan = namedtuple("VolumeScan", ["path", "total_space_gb", "free_space_gb", "error"])
+
+##################################################
+# Mount Discovery
+##################################################
+def _unescape_mount_path(path):
+    # /proc/mounts escapes spaces, tabs, newlines and backslashes as octal
+    for code, char in (("\\040", " "), ("\\011", "\t"), ("\\012", "\n"), ("\\134", "\\")):
+        path = path.replace(code, char)
+    return path
+
+def list_mount_points():
+    """Returns the mount points of real filesystems on this host."""
+    if os.name == "nt":
+        return [f"{letter}:\\" for letter in string.ascii_uppercase if os.path.exists(f"{letter}:\\")]
+
+    mounts = []
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3 or fields[2] in PSEUDO_FILESYSTEMS:
+                    continue
+                path = _unescape_mount_path(fields[1])
+                if path not in mounts:
+                    mounts.append(path)
+    except OSError:
+        # No procfs (macOS, BSD): fall back to the root filesystem
+        mounts = ["/"]
+    return mounts
+
+##################################################
+# Scanning
+##################################################
+def _stat_volume(path):
+    try:
+        usage = shutil.disk_usage(path)
+    except OSError as e:
+        return VolumeScan(path, None, None, str(e))
+    return VolumeScan(path, usage.total / BYTES_PER_GB, usage.free / BYTES_PER_GB, None)
+
+def _worker(tasks, results, started):
+    while True:
+        path = tasks.get()
+        if path is None:
+            return
+        started[path] = time.monotonic()
+        results.put(_stat_volume(path))
+
+@instrumented("scanner.scan_volumes")
+def scan_volumes(paths=None, timeout=DEFAULT_TIMEOUT, max_workers=DEFAULT_WORKERS):
+    """Queries every path concurrently and returns VolumeScan results in input order.
+
+    A path that does not answer within `timeout` seconds of being picked up
+    gets a VolumeScan with an error instead of blocking the remaining paths.
+    """
+    if paths is None:
+        paths = list_mount_points()
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return []
+
+    tasks = queue.Queue()
+    results = queue.Queue()
+    started = {}
+    for path in paths:
+        tasks.put(path)
+
+    workers = []
+
+    def spawn_worker():
+        worker = threading.Thread(target=_worker, args=(tasks, results, started), daemon=True)
+        worker.start()
+        workers.append(worker)
+
+    for _ in range(min(max_workers, len(paths))):
+        spawn_worker()
+
+    done = {}
+    while len(done) < len(paths):
+        try:
+            scan = results.get(timeout=min(timeout, 0.05))
+            if scan.path not in done:
+                done[scan.path] = scan
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        for path, start in list(started.items()):
+            if path not in done and now - start > timeout:
+                done[path] = VolumeScan(path, None, None, f"Timed out after {timeout:g} s")
+                # The stuck worker is abandoned; replace it so queued paths keep moving
+                spawn_worker()
+
+    # Let the workers exit once they are done
+    for _ in workers:
+        tasks.put(None)
+    return [done[path] for path in paths]
+
+##################################################
+# Model Conversion
+##################################################
+def scan_to_model(scan, target_free_percentage=None):
+    """Builds a DiskSpaceModel from a successful VolumeScan."""
+    model = DiskSpaceModel()
+    model.set_total_space_gb(scan.total_space_gb)
+    model.set_free_space_gb(scan.free_space_gb)
+    model.target_free_percentage = target_free_percentage
+    return model
+
+def scans_to_fleet(scans, target_free_percentage=None):
+    """Builds a FleetModel from the successful scans, returned with their paths."""
+    ok = [scan for scan in scans if scan.error is None]
+    fleet = FleetModel(
+        [scan.total_space_gb for scan in ok],
+        [scan.free_space_gb for scan in ok],
+        target_free_percentage,
+    )
+    return [scan.path for scan in ok], fleet
+
+##################################################
+# Command Line
+##################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan local volumes and report free space.")
+    parser.add_argument("paths", nargs="*", help="Paths to scan (default: all mounted filesystems)")
+    parser.add_argument("--target", type=float, help="Target free space percentage")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Per-volume timeout in seconds")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    scans = scan_volumes(args.paths or None, timeout=args.timeout, max_workers=args.workers)
+    for scan in scans:
+        if scan.error is not None:
+            print(f"{scan.path}: {scan.error}", file=sys.stderr)
+
+    paths, fleet = scans_to_fleet(scans, args.target)
+    for path, total_gb, (free_pct, used_pct, additional) in zip(paths, fleet.total_space_gb, fleet.to_rows()):
+        line = f"{path}: {total_gb:.2f} GB total, {free_pct:.2f}% free, {used_pct:.2f}% used"
+        if additional is not None:
+            line += f", {additional} GB needed for {args.target:.2f}% free"
+        print(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())